@@ -0,0 +1,145 @@
+"""
+bench_classifier.py — Link classifier (program + skip decision) micro-benchmark.
+
+Generates a large synthetic corpus of (filename, context) pairs sprinkled
+with program keys, skip patterns and record-layout markers, checks that
+scrape.classify_link() agrees with the original code path on every pair,
+and times three implementations:
+
+- legacy:   should_skip_file() + the PROGRAM_MAP loop, as parse_table_links
+            used to call them (lowercasing per key)
+- current:  scrape.classify_link()
+- regex:    one lookahead alternation over every key/pattern, built once;
+            kept here as the reference for why classify_link doesn't use it
+
+Usage:
+    python benchmarks/bench_classifier.py [num_links]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+import logging
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+DEFAULT_LINKS = 200000
+
+WORDS = [
+    "disclosure", "data", "fy", "q4", "record", "layout", "annual", "report",
+    "performance", "program", "selected", "statistics", "2016", "2021", "2024",
+    "_", "-", " ", "final", "pwd", "h-2", "cw", "lc",
+]
+
+# --- Original implementation ------------------------------------------
+
+def legacy_classify(scrape, filename, text_context=""):
+    combined = (filename + " " + text_context).lower()
+
+    skip = False
+    if "record layout" not in combined and "record_layout" not in combined:
+        for pattern in scrape.SKIP_PATTERNS:
+            if pattern in combined:
+                skip = True
+                break
+        if not skip and "annual" in combined and "report" in combined and filename.lower().endswith(".pdf"):
+            skip = True
+
+    program = None
+    for key, val in scrape.PROGRAM_MAP.items():
+        if key in text_context.lower() or key in filename.lower():
+            program = val
+            break
+
+    return skip, program
+
+# --- Regex alternative ------------------------------------------------
+
+def build_regex_classifier(scrape):
+    """
+    Single-pass regex matcher. The lookahead reports a token at every start
+    position so overlapping keys are all seen; longest-first ordering lets
+    "annual performance report" win over "annual", which is restored below.
+    """
+    markers = ("record layout", "record_layout", "annual", "report")
+    tokens = sorted(set(scrape.PROGRAM_MAP) | set(scrape.SKIP_PATTERNS) | set(markers), key=len, reverse=True)
+    token_re = re.compile("(?=(" + "|".join(re.escape(t) for t in tokens) + "))")
+    skip_patterns = frozenset(scrape.SKIP_PATTERNS)
+
+    def classify(filename, text_context=""):
+        found = set(token_re.findall((filename + " " + text_context).lower()))
+        if "annual performance report" in found:
+            found.update(("annual", "report"))
+
+        skip = False
+        if "record layout" not in found and "record_layout" not in found:
+            skip = not skip_patterns.isdisjoint(found) or (
+                "annual" in found and "report" in found and filename.lower().endswith(".pdf")
+            )
+
+        program = None
+        for key, val in scrape.PROGRAM_MAP.items():
+            if key in found:
+                program = val
+                break
+
+        return skip, program
+
+    return classify
+
+# --- Corpus -----------------------------------------------------------
+
+def build_corpus(scrape, size: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    tokens = WORDS + list(scrape.PROGRAM_MAP) + scrape.SKIP_PATTERNS + ["record layout", "record_layout"]
+    corpus = []
+    for _ in range(size):
+        name = "_".join(rng.choice(tokens) for _ in range(rng.randint(1, 5)))
+        filename = name.replace(" ", "_") + rng.choice(scrape.VALID_EXTS)
+        if rng.random() < 0.3:
+            filename = filename.upper()
+        context = " ".join(rng.choice(tokens) for _ in range(rng.randint(0, 6)))
+        corpus.append((filename, context))
+    return corpus
+
+# --- Benchmark --------------------------------------------------------
+
+def main(size: int):
+    os.chdir(tempfile.mkdtemp(prefix="bench_classifier_"))
+
+    import scrape
+    logging.getLogger("scraper").setLevel(logging.WARNING)
+
+    corpus = build_corpus(scrape, size)
+    regex_classify = build_regex_classifier(scrape)
+
+    implementations = [
+        ("legacy", lambda f, c: legacy_classify(scrape, f, c)),
+        ("current", scrape.classify_link),
+        ("regex", regex_classify),
+    ]
+
+    results = {}
+    print(f"links: {size}")
+    for name, classify in implementations:
+        start = time.perf_counter()
+        results[name] = [classify(f, c) for f, c in corpus]
+        elapsed = time.perf_counter() - start
+        print(f"{name:>8}: {elapsed:.3f}s ({size / elapsed:,.0f} links/s)")
+
+    mismatches = 0
+    for name in ("current", "regex"):
+        bad = sum(1 for a, b in zip(results["legacy"], results[name]) if a != b)
+        print(f"{name:>8} mismatches vs legacy: {bad}")
+        mismatches += bad
+
+    skipped = sum(1 for skip, _ in results["current"] if skip)
+    print(f"skipped: {skipped}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LINKS))
@@ -0,0 +1,160 @@
+"""
+bench_cleanup.py — Manifest/disk reconciliation: two serial passes vs. one parallel walk.
+
+Builds a synthetic data tree (Program / Year / files) and a manifest for it,
+with a fraction of tracked files deleted (stale entries) and some untracked
+files added (orphans), then times:
+
+- legacy:   the original find_stale_entries() (os.path.exists per entry)
+            followed by find_orphaned_files() (a serial os.walk)
+- reconcile: cleanup.reconcile(), one scandir walk with N worker threads
+- rebuild:   manifest loss: reconcile against an empty manifest, then
+             cleanup.adopt_orphans() for every file on disk
+
+--latency adds a fixed delay to every directory listing and exists() call,
+to approximate a network-mounted data volume.
+
+Usage:
+    python benchmarks/bench_cleanup.py [--files 20000] [--latency-ms 1] [--workers 1 8 32]
+"""
+
+import os
+import sys
+import time
+import shutil
+import random
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import cleanup
+from manifest_store import ManifestStore
+
+PROGRAMS = ["PERM Program", "LCA Program", "H-2A Program", "H-2B Program", "Prevailing Wage Program"]
+
+# --- Synthetic tree ---------------------------------------------------
+
+def build_tree(root: Path, files: int, stale: float, orphans: float, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    manifest = {}
+    for i in range(files):
+        program = PROGRAMS[i % len(PROGRAMS)]
+        year = str(2000 + (i // len(PROGRAMS)) % 25)
+        path = root / program / year / f"disclosure_{i}.xlsx"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+        manifest[f"https://example.test/{i}"] = {
+            "program": program, "filename": path.name, "year": year, "saved_path": str(path),
+        }
+    for entry in rng.sample(list(manifest.values()), int(files * stale)):
+        os.unlink(entry["saved_path"])
+    for i in range(int(files * orphans)):
+        program = PROGRAMS[i % len(PROGRAMS)]
+        (root / program / str(2000 + i % 25) / f"untracked_{i}.csv").write_bytes(b"")
+    return manifest
+
+# --- Original implementation ------------------------------------------
+
+def legacy_find_stale(manifest: dict) -> dict:
+    return {
+        url: entry for url, entry in manifest.items()
+        if not entry.get("saved_path") or not os.path.exists(entry["saved_path"])
+    }
+
+def legacy_find_orphans(manifest: dict, root: Path) -> list:
+    tracked = {os.path.normpath(e["saved_path"]) for e in manifest.values() if e.get("saved_path")}
+    orphaned = []
+    for dirpath, _, files in os.walk(root):
+        if "logs" in Path(dirpath).parts or ".blobs" in Path(dirpath).parts:
+            continue
+        for file in files:
+            if file in ("manifest.json", "manifest.json.bak"):
+                continue
+            if not any(file.lower().endswith(ext) for ext in cleanup.DATA_EXTENSIONS):
+                continue
+            filepath = os.path.normpath(os.path.join(dirpath, file))
+            if filepath not in tracked:
+                orphaned.append(Path(filepath))
+    return orphaned
+
+# --- Simulated storage latency ----------------------------------------
+
+def add_latency(seconds: float):
+    """Delay every scandir() and exists() call (os.walk uses scandir)."""
+    scandir, exists = os.scandir, os.path.exists
+
+    def slow_scandir(*args, **kwargs):
+        time.sleep(seconds)
+        return scandir(*args, **kwargs)
+
+    def slow_exists(path):
+        time.sleep(seconds)
+        return exists(path)
+
+    os.scandir = slow_scandir
+    os.path.exists = slow_exists
+
+# --- Benchmark --------------------------------------------------------
+
+def main(args):
+    logging.getLogger("cleanup").disabled = True
+    workdir = Path(tempfile.mkdtemp(prefix="bench_cleanup_"))
+    try:
+        manifest = build_tree(workdir, args.files, args.stale, args.orphans)
+        if args.latency_ms:
+            add_latency(args.latency_ms / 1000)
+        print(f"{args.files} tracked files, {args.stale:.0%} deleted, "
+              f"{args.orphans:.0%} orphans; {args.latency_ms}ms per listing/exists")
+        print(f"{'method':>16} {'scan':>9} {'reconcile':>10} {'total':>9} {'stale':>7} {'orphans':>8}")
+
+        start = time.perf_counter()
+        stale = legacy_find_stale(manifest)
+        stale_s = time.perf_counter() - start
+        orphaned = legacy_find_orphans(manifest, workdir)
+        total = time.perf_counter() - start
+        expected = (set(stale), set(orphaned))
+        print(f"{'legacy':>16} {total - stale_s:>8.3f}s {stale_s:>9.3f}s {total:>8.3f}s {len(stale):>7} {len(orphaned):>8}")
+
+        for workers in args.workers:
+            timings = {}
+            start = time.perf_counter()
+            stale, orphaned = cleanup.reconcile(manifest, root=workdir, workers=workers, timings=timings)
+            total = time.perf_counter() - start
+            assert (set(stale), set(orphaned)) == expected, "reconcile disagrees with legacy"
+            print(
+                f"{f'reconcile x{workers}':>16} {timings['scan']:>8.3f}s {timings['reconcile']:>9.3f}s "
+                f"{total:>8.3f}s {len(stale):>7} {len(orphaned):>8}"
+            )
+
+        cleanup.DATA_DIR = workdir
+        cleanup.BLOB_DIR = workdir / ".blobs"
+        workers = args.workers[-1]
+        with ManifestStore(str(workdir / "rebuild.db"), durable=False) as store:
+            timings = {}
+            start = time.perf_counter()
+            _, orphaned = cleanup.reconcile({}, root=workdir, workers=workers, timings=timings)
+            adopted = cleanup.adopt_orphans(store, orphaned, workers)
+            total = time.perf_counter() - start
+            assert len(store) == adopted == len(orphaned)
+        print(
+            f"{f'rebuild x{workers}':>16} {timings['scan']:>8.3f}s {total - timings['scan']:>9.3f}s "
+            f"{total:>8.3f}s {0:>7} {adopted:>8}"
+        )
+    finally:
+        shutil.rmtree(workdir)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cleanup.py manifest reconciliation.")
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--stale", type=float, default=0.05, help="fraction of tracked files deleted")
+    parser.add_argument("--orphans", type=float, default=0.02, help="untracked files, as a fraction of --files")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    main(parse_args())
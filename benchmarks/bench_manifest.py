@@ -0,0 +1,101 @@
+"""
+bench_manifest.py — Cost of recording one download vs. manifest size.
+
+For each manifest size, pre-populates a manifest and then times recording
+WRITES more downloads, one durable write per download:
+
+- json:        the original save_manifest(): rewrite the whole manifest.json
+               (with .bak copy) after every download, plus an fsync
+- wal-durable: ManifestStore.upsert() with durable=True (one fsync'd WAL append)
+- wal-fast:    ManifestStore.upsert() with durable=False (no per-commit fsync)
+
+Also reports how long compact() takes to fold the run's WAL back in.
+
+Usage:
+    python benchmarks/bench_manifest.py [size ...]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from manifest_store import ManifestStore
+
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+WRITES = 50
+JSON_MAX_SIZE = 10000   # the full-rewrite version gets very slow past this
+
+def make_entry(i: int) -> dict:
+    return {
+        "program": "PERM Program",
+        "filename": f"perm_disclosure_data_fy{2000 + i % 25}_{i}.xlsx",
+        "year": str(2000 + i % 25),
+        "saved_path": f"data/PERM Program/{2000 + i % 25}/perm_disclosure_data_fy{2000 + i % 25}_{i}.xlsx",
+        "sha256": f"{i:064x}",
+        "size": 1024 * i,
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "etag": f'"{i:032x}"',
+        "last_modified": None,
+    }
+
+# --- Original implementation ------------------------------------------
+
+def legacy_save(manifest: dict, path: str):
+    if os.path.exists(path):
+        shutil.copy2(path, f"{path}.bak")
+    temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".json.tmp")
+    with os.fdopen(temp_fd, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    shutil.move(temp_path, path)
+
+# --- Benchmark --------------------------------------------------------
+
+def bench_json(workdir: str, size: int) -> float:
+    path = os.path.join(workdir, "manifest.json")
+    manifest = {f"url{i}": make_entry(i) for i in range(size)}
+    legacy_save(manifest, path)
+    start = time.perf_counter()
+    for i in range(size, size + WRITES):
+        manifest[f"url{i}"] = make_entry(i)
+        legacy_save(manifest, path)
+    return (time.perf_counter() - start) / WRITES
+
+def bench_store(workdir: str, size: int, durable: bool):
+    path = os.path.join(workdir, f"manifest_{'durable' if durable else 'fast'}.db")
+    store = ManifestStore(path, durable=durable)
+    store.upsert_many({f"url{i}": make_entry(i) for i in range(size)})
+    store.compact()
+    start = time.perf_counter()
+    for i in range(size, size + WRITES):
+        store.upsert(f"url{i}", make_entry(i))
+    per_write = (time.perf_counter() - start) / WRITES
+    start = time.perf_counter()
+    store.compact()
+    compact_s = time.perf_counter() - start
+    store.close()
+    return per_write, compact_s
+
+def main(sizes):
+    print(f"{WRITES} recorded downloads per size; times are per download")
+    print(f"{'size':>7} {'json':>10} {'wal-durable':>12} {'wal-fast':>10} {'compact':>9}")
+    for size in sizes:
+        workdir = tempfile.mkdtemp(prefix="bench_manifest_")
+        json_ms = f"{bench_json(workdir, size) * 1000:>8.2f}ms" if size <= JSON_MAX_SIZE else f"{'-':>10}"
+        durable_s, compact_s = bench_store(workdir, size, durable=True)
+        fast_s, _ = bench_store(workdir, size, durable=False)
+        print(
+            f"{size:>7} {json_ms} {durable_s * 1000:>10.2f}ms "
+            f"{fast_s * 1000:>8.2f}ms {compact_s * 1000:>7.2f}ms"
+        )
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
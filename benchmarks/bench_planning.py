@@ -0,0 +1,123 @@
+"""
+bench_planning.py — Link discovery + skip-planning time vs. manifest size.
+
+Builds a synthetic portal page and a manifest of the same size in a scratch
+directory, then times scrape.discover_links() and scrape.plan_downloads().
+For smaller sizes it also times the previous implementation (linear scans
+of the links found so far and of every manifest entry) for comparison.
+
+Usage:
+    python benchmarks/bench_planning.py [size ...]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import logging
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+DEFAULT_SIZES = [500, 2000, 5000, 20000]
+LEGACY_MAX_SIZE = 5000   # the quadratic version gets very slow past this
+
+PROGRAMS = ["perm", "lca", "h-2a", "h-2b", "pw", "cw-1"]
+
+# --- Synthetic data ---------------------------------------------------
+
+def build_page(size: int) -> str:
+    """Portal-like page: a quarterly table plus one section per program."""
+    rows = []
+    sections = {p: [] for p in PROGRAMS}
+    for i in range(size):
+        program = PROGRAMS[i % len(PROGRAMS)]
+        href = f"/sites/files/{program}_disclosure_data_fy{2000 + i % 25}_{i}.xlsx"
+        if i % 10 == 0:
+            rows.append(f"<tr><td>{program.upper()} Program</td><td><a href=\"{href}\">Q4</a></td></tr>")
+        sections[program].append(f"<li><a href=\"{href}\">FY data</a></li>")
+
+    body = [f"<table>{''.join(rows)}</table>"]
+    for program, items in sections.items():
+        body.append(f"<h2>{program.upper()} Program</h2><ul>{''.join(items)}</ul>")
+    return f"<html><body>{''.join(body)}</body></html>"
+
+def build_manifest(scrape, links: list) -> dict:
+    entries = {}
+    for item in links:
+        program = scrape.clean_program_name(item["program"])
+        entries[item["url"]] = {
+            "program": program,
+            "filename": item["filename"],
+            "year": item["year"],
+            "saved_path": os.path.join(scrape.SAVE_DIR, program, item["year"], item["filename"]),
+            "sha256": "0" * 64,
+        }
+    return entries
+
+# --- Previous implementation ------------------------------------------
+
+def legacy_dedup(links: list) -> list:
+    deduped = []
+    for item in links:
+        if any(existing["url"] == item["url"] for existing in deduped):
+            continue
+        deduped.append(item)
+    return deduped
+
+def legacy_plan(scrape, links: list, manifest: dict) -> int:
+    planned = 0
+    for item in links:
+        program = scrape.clean_program_name(item["program"])
+        filepath = os.path.join(scrape.SAVE_DIR, program, item["year"], item["filename"])
+        if item["url"] in manifest:
+            planned += 1
+        elif any(entry.get("saved_path") == filepath for entry in manifest.values()):
+            continue
+        else:
+            planned += 1
+    return planned
+
+# --- Benchmark --------------------------------------------------------
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def main(sizes):
+    workdir = tempfile.mkdtemp(prefix="bench_planning_")
+    os.chdir(workdir)
+
+    import scrape
+    from bs4 import BeautifulSoup
+    from manifest_store import ManifestStore
+
+    logging.getLogger("scraper").setLevel(logging.WARNING)
+
+    print(f"{'size':>7} {'discover':>10} {'plan':>10} {'legacy dedup':>13} {'legacy plan':>12}")
+    for size in sizes:
+        soup = BeautifulSoup(build_page(size), "html.parser")
+        links, discover_s = timed(scrape.discover_links, soup)
+
+        store = ManifestStore(os.path.join(workdir, f"manifest_{size}.db"))
+        manifest = build_manifest(scrape, links)
+        # Half the entries are tracked under a different URL, so planning
+        # exercises both the URL lookup and the saved-path check
+        store.upsert_many({
+            (url if i % 2 else url + "?old"): entry
+            for i, (url, entry) in enumerate(manifest.items())
+        })
+        _, plan_s = timed(scrape.plan_downloads, links, store)
+
+        legacy = ""
+        if size <= LEGACY_MAX_SIZE:
+            _, dedup_s = timed(legacy_dedup, links)
+            _, legacy_plan_s = timed(legacy_plan, scrape, links, store.entries())
+            legacy = f"{dedup_s:>12.3f}s {legacy_plan_s:>11.3f}s"
+        store.close()
+
+        print(f"{size:>7} {discover_s:>9.3f}s {plan_s:>9.3f}s {legacy}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
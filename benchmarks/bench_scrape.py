@@ -0,0 +1,157 @@
+"""
+bench_scrape.py — End-to-end scrape.main() benchmark against the mock OFLC site.
+
+Starts benchmarks/mock_oflc.py in-process, then runs scrape.main() in a
+child process (so peak RSS is per scenario) for each scenario, reusing one
+scratch data directory so later scenarios see the earlier downloads:
+
+- cold:     empty data directory, every file downloaded
+- warm:     nothing changed; index fingerprint lets most files be skipped
+- full:     nothing changed, forced full revalidation (all 304s)
+- changed:  10% of files republished, full revalidation
+- latency:  full revalidation with latency added to every response
+- errors:   fresh data directory, 5% 503s and 5% truncated bodies
+
+Reports files checked, files downloaded, files/s and MB/s (from the run's
+metrics file), request count (from the mock server) and peak RSS.
+
+Usage:
+    python benchmarks/bench_scrape.py [--file-size-mb 1] [--tables 4] [--workers 4] ...
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from mock_oflc import MockOFLC
+
+SCENARIOS = ["cold", "warm", "full", "changed", "latency", "errors"]
+
+# --- Child: one scrape run --------------------------------------------
+
+def run_child(args):
+    """Run scrape.main() once in this process and print a JSON result."""
+    os.chdir(args.workdir)
+    sys.path.insert(0, PROJECT_DIR)
+
+    import scrape
+    scrape.BASE_URL = args.url
+    scrape.REQUESTS_PER_SECOND = args.rps
+    scrape.REQUEST_BURST = args.rps
+
+    start = time.perf_counter()
+    rc = scrape.main(workers=args.workers, full_revalidation=args.full)
+    elapsed = time.perf_counter() - start
+
+    reports = sorted(glob.glob(os.path.join(scrape.METRICS_DIR, "scrape_*.json")), key=os.path.getmtime)
+    summary = {}
+    if reports:
+        with open(reports[-1]) as f:
+            summary = json.load(f)["summary"]
+    results = summary.get("results", {})
+
+    print(json.dumps({
+        "rc": rc,
+        "seconds": elapsed,
+        "files": results.get("new", 0) + results.get("changed", 0),
+        "revalidated": summary.get("files", 0),
+        "bytes": summary.get("bytes", 0),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }))
+
+def run_scenario(args, mock: MockOFLC, workdir: str, full: bool) -> dict:
+    before = mock.stats().get("requests", 0)
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "--child",
+        "--url", mock.url, "--workdir", workdir,
+        "--workers", str(args.workers), "--rps", str(args.rps),
+    ]
+    if full:
+        cmd.append("--full")
+    output = subprocess.run(
+        cmd, check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["requests"] = mock.stats().get("requests", 0) - before
+    return result
+
+# --- Parent: scenarios ------------------------------------------------
+
+def main(args):
+    mock = MockOFLC(
+        tables=args.tables,
+        links_per_table=args.links_per_table,
+        section_links=args.section_links,
+        file_size=int(args.file_size_mb * 1024 * 1024),
+    )
+    workdir = tempfile.mkdtemp(prefix="bench_scrape_")
+    total_mb = len(mock.files) * mock.file_size / 1e6
+    print(f"mock site: {len(mock.files)} files, {total_mb:.1f} MB; workers={args.workers} rps={args.rps}")
+    print(f"workdir: {workdir}")
+    print(
+        f"{'scenario':>10} {'rc':>3} {'seconds':>8} {'checked':>8} {'files':>6} {'files/s':>8} "
+        f"{'MB':>8} {'MB/s':>8} {'requests':>9} {'peak RSS':>9}"
+    )
+
+    failures = 0
+    with mock:
+        for scenario in args.scenarios:
+            full = scenario != "warm" and scenario != "cold"
+            mock.latency = mock.error_rate = mock.truncate_rate = 0.0
+            scenario_dir = workdir
+            if scenario == "changed":
+                mock.bump(0.1)
+            elif scenario == "latency":
+                mock.latency = args.latency
+            elif scenario == "errors":
+                mock.error_rate = mock.truncate_rate = 0.05
+                scenario_dir = tempfile.mkdtemp(prefix="bench_scrape_errors_")
+                full = False
+
+            r = run_scenario(args, mock, scenario_dir, full)
+            # Injected errors are expected to fail some files
+            failures += r["rc"] != 0 and scenario != "errors"
+            mb = r["bytes"] / 1e6
+            print(
+                f"{scenario:>10} {r['rc']:>3} {r['seconds']:>7.2f}s {r['revalidated']:>8} {r['files']:>6} "
+                f"{r['files'] / r['seconds']:>8.1f} {mb:>8.1f} {mb / r['seconds']:>8.1f} "
+                f"{r['requests']:>9} {r['peak_rss_kb'] / 1024:>7.1f}MB"
+            )
+
+    return 1 if failures else 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scrape.main() against a local mock OFLC site.")
+    parser.add_argument("--tables", type=int, default=4)
+    parser.add_argument("--links-per-table", type=int, default=25)
+    parser.add_argument("--section-links", type=int, default=50)
+    parser.add_argument("--file-size-mb", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=1000.0,
+                        help="per-host request rate given to scrape.py (its default is much lower)")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="seconds added to every response in the latency scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    # Internal: run one scrape in a child process
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--full", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.child:
+        run_child(args)
+    else:
+        exit(main(args))
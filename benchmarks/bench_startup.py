@@ -0,0 +1,87 @@
+"""
+bench_startup.py — Import time and time to first request for scrape.py / cleanup.py.
+
+Each measurement runs in a fresh interpreter (so nothing is cached in
+sys.modules) inside an empty scratch directory:
+
+- import scrape / import cleanup: wall time of the import statement, and
+  whether it created any files or directories (it shouldn't)
+- first request: import scrape, then fetch and parse the mock OFLC portal
+  page with scrape.fetch_page(), i.e. the session, HTTP stack and HTML
+  parser are all set up on the way
+
+Reports the median and minimum over RUNS runs.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from mock_oflc import MockOFLC
+
+# Run with cwd = an empty scratch directory; prints one JSON line
+CHILD = """
+import os, sys, json, time
+sys.path.insert(0, {project!r})
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter() - start
+result = {{"import": imported}}
+if {url!r}:
+    {module}.BASE_URL = {url!r}
+    page = {module}.fetch_page({url!r}, None)
+    result["first_request"] = time.perf_counter() - start
+    result["links"] = len(page["links"])
+result["created"] = sorted(os.listdir("."))
+print(json.dumps(result))
+"""
+
+def run_child(module: str, url: str = "") -> dict:
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as workdir:
+        code = CHILD.format(project=PROJECT_DIR, module=module, url=url)
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=workdir,
+            check=True, capture_output=True, text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def report(label: str, samples: list, created: set):
+    ms = [s * 1000 for s in samples]
+    note = f"  created: {', '.join(sorted(created))}" if created else ""
+    print(f"{label:>24} {statistics.median(ms):>9.1f}ms {min(ms):>9.1f}ms{note}")
+
+def main(args):
+    print(f"{args.runs} fresh interpreters per measurement")
+    print(f"{'measurement':>24} {'median':>11} {'min':>11}")
+
+    # cleanup.py resolves its data directory next to the script, so only
+    # scrape.py's (cwd-relative) side effects show up in the scratch dir
+    for module in ("scrape", "cleanup"):
+        results = [run_child(module) for _ in range(args.runs)]
+        created = {name for r in results for name in r["created"]}
+        report(f"import {module}", [r["import"] for r in results], created)
+
+    with MockOFLC(tables=args.tables) as mock:
+        results = [run_child("scrape", mock.url) for _ in range(args.runs)]
+    report("scrape first request", [r["first_request"] for r in results], set())
+    print(f"{'':>24} ({results[-1]['links']} links on the portal page)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scrape.py/cleanup.py startup time.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--tables", type=int, default=4)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    main(parse_args())
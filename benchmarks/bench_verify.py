@@ -0,0 +1,83 @@
+"""
+bench_verify.py — Cost of cleanup.py --verify: cold, warm and after changes.
+
+Writes FILES random files of SIZE bytes plus a manifest for them, then
+times cleanup.verify_files():
+
+- cold:     empty hash cache, every file read (for each worker count)
+- warm:     nothing changed, every hash comes from the cache
+- touched:  10% of files rewritten, only those are read again
+
+Usage:
+    python benchmarks/bench_verify.py [--files 200] [--size-mb 4] [--workers 1 4 8]
+"""
+
+import os
+import sys
+import time
+import shutil
+import random
+import hashlib
+import logging
+import argparse
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import cleanup
+from manifest_store import ManifestStore
+
+def build_files(root: str, files: int, size: int) -> dict:
+    manifest = {}
+    for i in range(files):
+        path = os.path.join(root, f"file_{i}.xlsx")
+        data = random.randbytes(size)
+        with open(path, "wb") as f:
+            f.write(data)
+        manifest[f"https://example.test/{i}"] = {
+            "saved_path": path, "filename": os.path.basename(path), "sha256": hashlib.sha256(data).hexdigest(),
+        }
+    return manifest
+
+def run(label: str, store: ManifestStore, manifest: dict, workers: int):
+    start = time.perf_counter()
+    mismatches, counts = cleanup.verify_files(store, manifest, workers)
+    elapsed = time.perf_counter() - start
+    mb = counts["bytes_hashed"] / 1e6
+    print(
+        f"{label:>12} {workers:>8} {elapsed:>8.3f}s {counts['hashed']:>7} {counts['cached']:>7} "
+        f"{mb / elapsed if mb else 0:>8.0f} {len(mismatches):>10}"
+    )
+
+def main(args):
+    logging.getLogger("cleanup").disabled = True
+    workdir = tempfile.mkdtemp(prefix="bench_verify_")
+    try:
+        manifest = build_files(workdir, args.files, int(args.size_mb * 1024 * 1024))
+        total_mb = args.files * args.size_mb
+        print(f"{args.files} files, {total_mb:.0f} MB (likely in page cache; cold-disk reads are slower)")
+        print(f"{'run':>12} {'workers':>8} {'seconds':>9} {'hashed':>7} {'cached':>7} {'MB/s':>8} {'mismatches':>10}")
+
+        for workers in args.workers:
+            db = os.path.join(workdir, f"verify_{workers}.db")
+            with ManifestStore(db, durable=False) as store:
+                run("cold", store, manifest, workers)
+        with ManifestStore(db, durable=False) as store:
+            run("warm", store, manifest, args.workers[-1])
+            for entry in random.sample(list(manifest.values()), args.files // 10):
+                with open(entry["saved_path"], "r+b") as f:
+                    f.write(b"changed")
+            run("touched", store, manifest, args.workers[-1])
+    finally:
+        shutil.rmtree(workdir)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cleanup.py checksum verification.")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--size-mb", type=float, default=4.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,112 @@
+"""
+bench_xlsx.py — Workbook -> Parquet conversion: whole-DataFrame vs. streaming.
+
+Writes a synthetic PERM-style disclosure workbook (ROWS x COLUMNS, mixed
+text, numbers and dates), then converts it with:
+
+- pandas:    the original pd.read_excel(dtype=str) + DataFrame.to_parquet()
+- openpyxl:  convert_file() streaming through openpyxl's read-only mode
+- calamine:  convert_file() streaming through python-calamine (if installed)
+
+Each conversion runs in a fresh subprocess so its peak RSS is its own.
+
+Usage:
+    python benchmarks/bench_xlsx.py [--rows 100000] [--columns 30] [--batch-rows 50000]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+STATES = ["CA", "TX", "NY", "WA", "NJ", "IL", "MA", "GA"]
+
+def build_workbook(path: str, rows: int, columns: int, seed: int = 0):
+    import openpyxl
+
+    rng = random.Random(seed)
+    start = datetime(2023, 10, 1)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["CASE_NUMBER", "DECISION_DATE", "EMPLOYER_STATE", "WAGE_OFFER"]
+                 + [f"FIELD_{i}" for i in range(columns - 4)])
+    for i in range(rows):
+        sheet.append(
+            [f"G-100-{i:08d}", start + timedelta(days=rng.randrange(365)), rng.choice(STATES),
+             round(rng.uniform(40000, 250000), 2)]
+            + [f"value {rng.randrange(1000)}" if j % 3 else rng.randrange(100000) for j in range(columns - 4)]
+        )
+    workbook.save(path)
+
+def convert(method: str, source: str, target: str, batch_rows: int):
+    """Run one conversion in this process and print JSON stats."""
+    import resource
+    import convert_to_parquet_perm as converter
+
+    start = time.perf_counter()
+    if method == "pandas":
+        import pandas as pd
+        df = pd.read_excel(source, dtype=str)
+        df.to_parquet(target)
+        rows = len(df)
+    else:
+        converter.XLSX_READER = method
+        converter.XLSX_BATCH_ROWS = batch_rows
+        _, rows = converter.convert_file(source, target)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_mb, "rows": rows}))
+
+def main(args):
+    try:
+        import python_calamine  # noqa: F401
+        methods = ["pandas", "openpyxl", "calamine"]
+    except ImportError:
+        methods = ["pandas", "openpyxl"]
+
+    workdir = tempfile.mkdtemp(prefix="bench_xlsx_")
+    try:
+        source = os.path.join(workdir, "perm.xlsx")
+        start = time.perf_counter()
+        build_workbook(source, args.rows, args.columns)
+        size_mb = os.path.getsize(source) / 1e6
+        print(f"{args.rows} rows x {args.columns} columns, {size_mb:.1f} MB workbook "
+              f"(built in {time.perf_counter() - start:.1f}s); batch {args.batch_rows} rows")
+        print(f"{'method':>10} {'seconds':>9} {'rows/s':>9} {'peak RSS':>10}")
+
+        for method in methods:
+            target = os.path.join(workdir, f"{method}.parquet")
+            out = subprocess.run(
+                [sys.executable, __file__, "--run", method, source, target, "--batch-rows", str(args.batch_rows)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            stats = json.loads(out.strip().splitlines()[-1])
+            assert stats["rows"] == args.rows, f"{method} converted {stats['rows']} rows"
+            print(f"{method:>10} {stats['seconds']:>8.2f}s {stats['rows'] / stats['seconds']:>9.0f} "
+                  f"{stats['peak_mb']:>8.0f}MB")
+    finally:
+        shutil.rmtree(workdir)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark workbook to Parquet conversion.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--columns", type=int, default=30)
+    parser.add_argument("--batch-rows", type=int, default=50_000)
+    parser.add_argument("--run", nargs=3, metavar=("METHOD", "SOURCE", "TARGET"), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.run:
+        convert(*args.run, args.batch_rows)
+    else:
+        main(args)
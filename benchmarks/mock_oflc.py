@@ -0,0 +1,320 @@
+"""
+mock_oflc.py — Local stand-in for the OFLC performance page and its files.
+
+Serves a synthetic portal page (quarterly tables plus per-program sections)
+and generated disclosure files, so scrape.py can be benchmarked and
+regression-tested without touching dol.gov.
+
+Features:
+- Configurable number of tables, links per table and section links
+- Large files generated on the fly from a per-file seed (nothing on disk)
+- ETag / Last-Modified validators, 304 for If-None-Match / If-Modified-Since
+- Range requests with If-Range, HEAD, HTTP/1.1 keep-alive
+- Injectable latency, 503 + Retry-After errors and truncated bodies
+- Request counters by method and status
+
+Usage:
+    python benchmarks/mock_oflc.py [--port 8765] [--tables 4] [--file-size-mb 1] ...
+"""
+
+import time
+import random
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+PAGE_PATH = "/agencies/eta/foreign-labor/performance"
+FILES_PATH = "/sites/dolgov/files/ETA/oflc/pdfs"
+
+PROGRAMS = [
+    ("PERM Program", "PERM"),
+    ("LCA Program (H-1B, H-1B1, E-3)", "LCA"),
+    ("H-2A Program", "H-2A"),
+    ("H-2B Program", "H-2B"),
+    ("Prevailing Wage Program", "PW"),
+    ("CW-1 Program", "CW-1"),
+]
+
+BLOCK_SIZE = 64 * 1024
+BASE_MTIME = 1700000000   # Last-Modified of version 0
+
+# --- Synthetic site ---------------------------------------------------
+
+class MockOFLC:
+    """
+    The mock site plus its HTTP server. Use as a context manager, or call
+    start()/stop(). `url` is the portal page URL to set as scrape.BASE_URL.
+    """
+
+    def __init__(
+        self,
+        tables: int = 4,
+        links_per_table: int = 25,
+        section_links: int = 50,
+        file_size: int = 1024 * 1024,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        truncate_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.file_size = file_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._blocks: Dict[Tuple[str, int], bytes] = {}
+        self.counters: Dict[str, int] = {}
+
+        # path -> version; bumping a version changes content and validators
+        self.files: Dict[str, int] = {}
+        self.page = self._build_page(tables, links_per_table, section_links)
+        self.page_etag = '"%s"' % hashlib.sha256(self.page).hexdigest()[:32]
+
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{PAGE_PATH}"
+
+    def _add_file(self, program: str, year: int, tag: str) -> str:
+        path = f"{FILES_PATH}/{program}_Disclosure_Data_FY{year}_{tag}.xlsx"
+        self.files[path] = 0
+        return path
+
+    def _build_page(self, tables: int, links_per_table: int, section_links: int) -> bytes:
+        body = ["<html><body><h1>Performance Data</h1>"]
+
+        for t in range(tables):
+            rows = []
+            for i in range(links_per_table):
+                label, program = PROGRAMS[i % len(PROGRAMS)]
+                path = self._add_file(program, 2000 + (t * links_per_table + i) % 25, f"T{t}_{i}")
+                rows.append(f'<tr><td>{label}</td><td><a href="{path}">Q4</a></td></tr>')
+            body.append(f"<h2>Latest Quarterly Updates {t}</h2><table>{''.join(rows)}</table>")
+
+        sections: Dict[str, List[str]] = {label: [] for label, _ in PROGRAMS}
+        for i in range(section_links):
+            label, program = PROGRAMS[i % len(PROGRAMS)]
+            path = self._add_file(program, 2000 + i % 25, f"S{i}")
+            sections[label].append(f'<li><a href="{path}">FY data</a></li>')
+        for label, items in sections.items():
+            if items:
+                body.append(f"<h2>{label}</h2><ul>{''.join(items)}</ul>")
+
+        body.append("</body></html>")
+        return "".join(body).encode("utf-8")
+
+    # --- Control ------------------------------------------------------
+
+    def start(self) -> "MockOFLC":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def bump(self, fraction: float) -> int:
+        """Publish a new version of a random fraction of files. Returns count."""
+        with self._lock:
+            paths = sorted(self.files)
+            changed = self._rng.sample(paths, int(len(paths) * fraction))
+            for path in changed:
+                self.files[path] += 1
+        return len(changed)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def count(self, key: str):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def roll(self, rate: float) -> bool:
+        if not rate:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    # --- Content ------------------------------------------------------
+
+    def validators(self, path: str) -> Tuple[str, str]:
+        version = self.files[path]
+        digest = hashlib.sha256(f"{path}:{version}".encode()).hexdigest()[:32]
+        return f'"{digest}"', formatdate(BASE_MTIME + version * 86400, usegmt=True)
+
+    def block(self, path: str) -> bytes:
+        """The 64 KiB block a file's content repeats, derived from path+version."""
+        key = (path, self.files[path])
+        with self._lock:
+            block = self._blocks.get(key)
+        if block is None:
+            seed = hashlib.sha256(f"{key[0]}:{key[1]}".encode()).digest()
+            block = (seed * (BLOCK_SIZE // len(seed) + 1))[:BLOCK_SIZE]
+            with self._lock:
+                self._blocks[key] = block
+        return block
+
+    def content(self, path: str, start: int, end: int):
+        """Yield the bytes of [start, end) in block-sized pieces."""
+        block = self.block(path)
+        pos = start
+        while pos < end:
+            offset = pos % BLOCK_SIZE
+            piece = block[offset:min(BLOCK_SIZE, offset + end - pos)]
+            yield piece
+            pos += len(piece)
+
+# --- HTTP handler -----------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def mock(self) -> MockOFLC:
+        return self.server.mock
+
+    def do_HEAD(self):
+        self.handle_request(head=True)
+
+    def do_GET(self):
+        self.handle_request(head=False)
+
+    def send(self, status: int, headers: Dict[str, str]):
+        self.mock.count("requests")
+        self.mock.count(f"{self.command} {status}")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def not_modified(self, etag: str, last_modified: Optional[str]) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return if_none_match == etag
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since and last_modified:
+            try:
+                return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def handle_request(self, head: bool):
+        mock = self.mock
+        path = self.path.split("?", 1)[0]
+
+        if mock.latency:
+            time.sleep(mock.latency)
+
+        if path == PAGE_PATH:
+            if self.not_modified(mock.page_etag, None):
+                self.send(304, {"ETag": mock.page_etag})
+                return
+            self.send(200, {
+                "ETag": mock.page_etag,
+                "Content-Type": "text/html; charset=utf-8",
+                "Content-Length": str(len(mock.page)),
+            })
+            if not head:
+                self.wfile.write(mock.page)
+            return
+
+        if path not in mock.files:
+            self.send(404, {"Content-Length": "0"})
+            return
+
+        if mock.roll(mock.error_rate):
+            self.send(503, {"Retry-After": str(mock.retry_after), "Content-Length": "0"})
+            return
+
+        etag, last_modified = mock.validators(path)
+        if self.not_modified(etag, last_modified):
+            self.send(304, {"ETag": etag, "Last-Modified": last_modified})
+            return
+
+        size = mock.file_size
+        start, status = 0, 200
+        headers = {"ETag": etag, "Last-Modified": last_modified, "Accept-Ranges": "bytes"}
+
+        range_header = self.headers.get("Range", "")
+        if_range = self.headers.get("If-Range")
+        if range_header.startswith("bytes=") and if_range in (None, etag, last_modified):
+            first = range_header[len("bytes="):].split("-", 1)[0]
+            if first.isdigit() and int(first) < size:
+                start, status = int(first), 206
+                headers["Content-Range"] = f"bytes {start}-{size - 1}/{size}"
+
+        headers["Content-Length"] = str(size - start)
+        self.send(status, headers)
+        if head:
+            return
+
+        # Truncated responses drop the connection halfway through the body
+        end = size
+        if mock.roll(mock.truncate_rate):
+            end = start + (size - start) // 2
+            self.close_connection = True
+
+        try:
+            for piece in mock.content(path, start, end):
+                self.wfile.write(piece)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+# --- CLI --------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a mock OFLC performance page.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tables", type=int, default=4)
+    parser.add_argument("--links-per-table", type=int, default=25)
+    parser.add_argument("--section-links", type=int, default=50)
+    parser.add_argument("--file-size-mb", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of file requests answered 503")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="fraction of bodies cut off halfway")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    mock = MockOFLC(
+        tables=args.tables,
+        links_per_table=args.links_per_table,
+        section_links=args.section_links,
+        file_size=int(args.file_size_mb * 1024 * 1024),
+        latency=args.latency,
+        error_rate=args.error_rate,
+        truncate_rate=args.truncate_rate,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Serving {len(mock.files)} files; portal page at {mock.url}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -2,38 +2,93 @@
 cleanup.py — Removes stale entries from manifest when files no longer exist.
 
 Features:
-- Scans manifest for missing files on disk
-- Removes stale entries atomically
-- Creates backup before modification
+- Reconciles manifest and disk in one parallel scandir walk (stale entries
+  and orphaned files together), with per-phase timings
+- Removes stale entries in a single manifest-store transaction
+- Exports manifest.json (with backup) after modification
 - Detailed reporting of cleaned entries
 - Safe: only removes entries where files are confirmed missing
+- Prunes content-addressed blobs no longer referenced by any entry
+- Optional integrity check (--verify): re-hashes files in parallel, skipping
+  files unchanged since their last verification
+- Optional rebuild (--adopt-orphans): hashes untracked files in parallel and
+  adds them to the manifest in one transaction, e.g. after manifest loss
+- Watch mode (--watch, Linux): follows inotify events to keep the manifest
+  in sync as files are deleted, moved or written
+- Side-effect-free import: the log directory and file are created by main()
 """
 
 import os
-import json
-import shutil
+import time
+import hashlib
 import logging
+import signal
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-import tempfile
-from typing import Dict, List, Set
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from manifest_store import CachedHash, ManifestStore
 
 # --- Configuration ----------------------------------------------------
 
 PROJECT_DIR = Path(__file__).parent.absolute()
 DATA_DIR = PROJECT_DIR / "data"
 MANIFEST_PATH = DATA_DIR / "manifest.json"
+MANIFEST_DB_PATH = DATA_DIR / "manifest.db"
+BLOB_DIR = DATA_DIR / ".blobs"
 LOG_DIR = DATA_DIR / "logs"
-LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+# Files on disk that count as downloads (others are never reported as orphans)
+DATA_EXTENSIONS = (".xlsx", ".csv", ".pdf", ".docx", ".doc", ".zip", ".xls")
+MANIFEST_FILES = ("manifest.json", "manifest.json.bak")
+
+# Reconciliation walk: directories are listed by SCAN_WORKERS threads at
+# once (helps most on network-mounted data volumes); SKIP_DIRS are not entered
+SCAN_WORKERS = 8
+SKIP_DIRS = ("logs", ".blobs")
+
+# Verification (--verify): files are re-hashed by VERIFY_WORKERS threads
+# (hashlib releases the GIL, so threads hash in parallel) reading
+# VERIFY_READ_SIZE bytes at a time. A file whose (inode, size, mtime_ns)
+# match the hash cache in manifest.db is not read again.
+VERIFY_WORKERS = 4
+VERIFY_READ_SIZE = 8 * 1024 * 1024
+
+# Exit status when --verify finds files that don't match their checksum
+# (1 is any other failure); cron.py reports it instead of retrying
+EXIT_MISMATCH = 2
+
+# Watch mode (--watch): changes are applied every WATCH_FLUSH_SECONDS.
+# New files are adopted once nothing has written to them for
+# WATCH_SETTLE_SECONDS (scrape.py records its own downloads well within
+# that), and a full reconcile runs every WATCH_RESCAN_HOURS as a safety net.
+WATCH_FLUSH_SECONDS = 5
+WATCH_SETTLE_SECONDS = 30
+WATCH_RESCAN_HOURS = 24
 
 # --- Logging Setup ----------------------------------------------------
 
+# Configured by setup_logging() when a run starts, not at import
+logger = logging.getLogger("cleanup")
+_logging_ready = False
+
 def setup_logging():
-    """Setup versioned logging for cleanup operations."""
+    """
+    Setup versioned logging for cleanup operations. Later calls return the
+    already configured logger.
+    """
+    global _logging_ready
+    if _logging_ready:
+        return logger
+    
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_file = LOG_DIR / f"cleanup_{timestamp}.log"
     
-    logger = logging.getLogger("cleanup")
     logger.setLevel(logging.DEBUG)
     logger.handlers = []
     
@@ -56,163 +111,221 @@ def setup_logging():
     logger.addHandler(console_handler)
     
     logger.info(f"Cleanup logging to: {log_file}")
+    _logging_ready = True
     return logger
 
-logger = setup_logging()
-
 # --- Utilities --------------------------------------------------------
 
-def load_manifest() -> Dict:
-    """Load manifest.json safely."""
-    if not MANIFEST_PATH.exists():
-        logger.error(f"Manifest not found: {MANIFEST_PATH}")
-        return {}
-    
-    try:
-        with open(MANIFEST_PATH, 'r') as f:
-            manifest = json.load(f)
-            logger.info(f"Loaded manifest with {len(manifest)} entries")
-            return manifest
-    except json.JSONDecodeError as e:
-        logger.error(f"Manifest corrupted: {e}")
-        
-        # Try backup
-        backup_path = Path(str(MANIFEST_PATH) + ".bak")
-        if backup_path.exists():
-            logger.info("Attempting to restore from backup...")
-            try:
-                with open(backup_path, 'r') as f:
-                    manifest = json.load(f)
-                    logger.info(f"Restored {len(manifest)} entries from backup")
-                    return manifest
-            except json.JSONDecodeError:
-                logger.error("Backup also corrupted")
-        
-        return {}
-
-def save_manifest_atomic(manifest: Dict):
+def open_manifest(create: bool = False) -> Optional[ManifestStore]:
     """
-    Atomically save manifest.json with backup.
-    Uses atomic write pattern: write to temp file, then rename.
+    Open the SQLite manifest store shared with scrape.py, importing
+    manifest.json (or its backup) if the store doesn't exist yet.
+    Returns None if there is no manifest at all, unless create is set.
     """
-    # Create backup of existing manifest
-    if MANIFEST_PATH.exists():
-        backup_path = Path(str(MANIFEST_PATH) + ".bak")
-        try:
-            shutil.copy2(MANIFEST_PATH, backup_path)
-            logger.debug(f"Created manifest backup: {backup_path}")
-        except Exception as e:
-            logger.error(f"Failed to create manifest backup: {e}")
-            raise
-    
-    # Write to temporary file first
-    temp_fd, temp_path = tempfile.mkstemp(
-        dir=DATA_DIR,
-        prefix=".manifest_",
-        suffix=".json.tmp"
-    )
-    
+    backup_path = Path(str(MANIFEST_PATH) + ".bak")
+    if not MANIFEST_DB_PATH.exists() and not MANIFEST_PATH.exists() and not backup_path.exists():
+        if not create:
+            logger.error(f"Manifest not found: {MANIFEST_DB_PATH}")
+            return None
+        logger.warning(f"Manifest not found - creating {MANIFEST_DB_PATH}")
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+    
+    store = ManifestStore(str(MANIFEST_DB_PATH))
+    if len(store) == 0:
+        imported = store.import_json(str(MANIFEST_PATH))
+        if imported:
+            logger.info(f"Imported {imported} entries from {MANIFEST_PATH}")
+    
+    logger.info(f"Loaded manifest with {len(store)} entries")
+    return store
+
+def export_manifest(store: ManifestStore):
+    """Export the manifest store to manifest.json (keeping a .bak copy)."""
     try:
-        with os.fdopen(temp_fd, 'w') as f:
-            json.dump(manifest, f, indent=2)
-        
-        # Atomic rename
-        shutil.move(temp_path, MANIFEST_PATH)
-        logger.debug("Manifest saved atomically")
-        
+        store.export_json(str(MANIFEST_PATH))
+        logger.debug(f"Manifest exported to {MANIFEST_PATH}")
     except Exception as e:
-        # Clean up temp file on error
-        try:
-            os.unlink(temp_path)
-        except:
-            pass
-        logger.error(f"Failed to save manifest: {e}")
+        logger.error(f"Failed to export manifest: {e}")
         raise
 
 # --- Cleanup Logic ----------------------------------------------------
 
-def find_stale_entries(manifest: Dict) -> Dict[str, Dict]:
+@contextmanager
+def timed(timings: Dict[str, float], phase: str) -> Iterator[None]:
+    """Add the time spent in the block to timings[phase]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+
+def scan_directory(path: str) -> Tuple[List[str], List[str], bool]:
     """
-    Find manifest entries where the corresponding file no longer exists.
-    Returns dict of {url: entry} for stale entries.
+    List one directory with a single scandir call.
+    Returns (file paths, subdirectory paths to scan, listed ok).
     """
-    stale_entries = {}
-    
-    logger.info("Scanning manifest for stale entries...")
-    
-    for url, entry in manifest.items():
-        saved_path = entry.get("saved_path")
-        
-        if not saved_path:
-            logger.warning(f"Entry missing 'saved_path': {url}")
-            stale_entries[url] = entry
-            continue
-        
-        # Check if file exists
-        if not os.path.exists(saved_path):
-            logger.debug(f"File missing: {saved_path}")
-            stale_entries[url] = entry
-    
-    return stale_entries
+    files, subdirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            subdirs.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError as e:
+        logger.warning(f"Cannot scan {path}: {e}")
+        return files, subdirs, False
+    return files, subdirs, True
 
-def find_orphaned_files(manifest: Dict) -> List[Path]:
+def scan_tree(root: Path, workers: int = SCAN_WORKERS) -> Tuple[Set[str], Set[str]]:
     """
-    Find files on disk that aren't tracked in the manifest.
-    Returns list of orphaned file paths.
+    Walk root with up to `workers` directories listed concurrently.
+    Returns (all file paths, directories that were listed completely).
     """
-    logger.info("Scanning filesystem for orphaned files...")
-    
-    # Get all tracked file paths from manifest
-    tracked_paths = set()
-    for entry in manifest.values():
-        saved_path = entry.get("saved_path")
-        if saved_path:
-            tracked_paths.add(os.path.normpath(saved_path))
-    
-    # Scan filesystem
-    orphaned = []
-    valid_extensions = (".xlsx", ".csv", ".pdf", ".docx", ".doc", ".zip", ".xls")
-    
-    for root, dirs, files in os.walk(DATA_DIR):
-        # Skip logs directory
-        if "logs" in Path(root).parts:
-            continue
+    files: Set[str] = set()
+    scanned: Set[str] = set()
+    root_path = os.path.abspath(root)
+    if not os.path.isdir(root_path):
+        return files, scanned
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(scan_directory, root_path): root_path}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                dir_files, subdirs, ok = future.result()
+                files.update(dir_files)
+                if ok:
+                    scanned.add(path)
+                for subdir in subdirs:
+                    pending[pool.submit(scan_directory, subdir)] = subdir
+    
+    return files, scanned
+
+def reconcile(
+    manifest: Dict,
+    root: Optional[Path] = None,
+    workers: int = SCAN_WORKERS,
+    timings: Optional[Dict[str, float]] = None,
+) -> Tuple[Dict[str, Dict], List[Path]]:
+    """
+    Compare the manifest with the data tree in one walk.
+    Returns (stale entries as {url: entry}, orphaned file paths).
+    
+    A tracked file is stale when its directory was listed and the file
+    wasn't in it. Files whose directory wasn't listed (outside the tree,
+    in a skipped or unreadable directory, or already gone) are checked
+    individually, so nothing is reported stale without being confirmed
+    missing.
+    """
+    timings = timings if timings is not None else {}
+    root = root or DATA_DIR
+    
+    logger.info(f"Scanning {root} ({workers} workers)...")
+    with timed(timings, "scan"):
+        on_disk, scanned = scan_tree(root, workers)
+    logger.info(f"Found {len(on_disk)} files in {len(scanned)} directories")
+    
+    logger.info("Reconciling manifest with disk...")
+    with timed(timings, "reconcile"):
+        stale_entries = {}
+        tracked: Set[str] = set()
+        unlisted: Dict[str, List[str]] = {}
+        cwd = os.getcwd()
         
-        for file in files:
-            # Skip manifest files
-            if file in ["manifest.json", "manifest.json.bak"]:
+        for url, entry in manifest.items():
+            saved_path = entry.get("saved_path")
+            if not saved_path:
+                logger.warning(f"Entry missing 'saved_path': {url}")
+                stale_entries[url] = entry
                 continue
             
-            # Only check valid data files
-            if not any(file.lower().endswith(ext) for ext in valid_extensions):
+            path = os.path.normpath(os.path.join(cwd, saved_path))
+            tracked.add(path)
+            if path in on_disk:
                 continue
-            
-            filepath = os.path.normpath(os.path.join(root, file))
-            
-            if filepath not in tracked_paths:
-                orphaned.append(Path(filepath))
+            if os.path.dirname(path) in scanned:
+                logger.debug(f"File missing: {saved_path}")
+                stale_entries[url] = entry
+            else:
+                unlisted.setdefault(path, []).append(url)
+        
+        if unlisted:
+            paths = list(unlisted)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for path, exists in zip(paths, pool.map(os.path.exists, paths)):
+                    if not exists:
+                        logger.debug(f"File missing: {path}")
+                        for url in unlisted[path]:
+                            stale_entries[url] = manifest[url]
+        
+        orphaned = sorted(
+            Path(path) for path in on_disk - tracked
+            if path.lower().endswith(DATA_EXTENSIONS)
+            and os.path.basename(path) not in MANIFEST_FILES
+        )
     
-    return orphaned
+    return stale_entries, orphaned
 
-def cleanup_stale_entries(manifest: Dict, stale_entries: Dict[str, Dict]) -> Dict:
+def find_unreferenced_blobs(manifest: Dict) -> List[Path]:
     """
-    Remove stale entries from manifest.
-    Returns cleaned manifest.
+    Find blobs in the content-addressed store that no manifest entry points
+    to and that have no remaining hardlink in the data tree.
+    Returns list of blob paths safe to delete.
+    """
+    if not BLOB_DIR.exists():
+        return []
+    
+    logger.info("Scanning blob store for unreferenced blobs...")
+    
+    referenced = {entry.get("sha256") for entry in manifest.values()}
+    unreferenced = []
+    
+    for blob in BLOB_DIR.glob("*/*"):
+        if blob.name in referenced:
+            continue
+        # A link count above 1 means some file in the tree still uses it
+        if blob.stat().st_nlink > 1:
+            continue
+        unreferenced.append(blob)
+    
+    return unreferenced
+
+def prune_blobs(blobs: List[Path]) -> int:
+    """Delete unreferenced blobs. Returns number of bytes freed."""
+    freed = 0
+    for blob in blobs:
+        try:
+            size = blob.stat().st_size
+            blob.unlink()
+            freed += size
+            logger.debug(f"Pruned blob: {blob.name}")
+        except OSError as e:
+            logger.warning(f"Failed to prune blob {blob.name}: {e}")
+    return freed
+
+def cleanup_stale_entries(store: ManifestStore, stale_entries: Dict[str, Dict]) -> int:
+    """
+    Remove stale entries from the manifest store in one transaction.
+    Returns number of entries removed.
     """
     if not stale_entries:
         logger.info("No stale entries to clean")
-        return manifest
+        return 0
     
     logger.info(f"Removing {len(stale_entries)} stale entries from manifest...")
     
-    cleaned_manifest = manifest.copy()
-    
-    for url in stale_entries.keys():
-        del cleaned_manifest[url]
+    original_count = len(store)
+    removed = store.delete(stale_entries.keys())
     
-    logger.info(f"Manifest cleaned: {len(manifest)} → {len(cleaned_manifest)} entries")
+    logger.info(f"Manifest cleaned: {original_count} → {len(store)} entries")
     
-    return cleaned_manifest
+    return removed
 
 def generate_report(stale_entries: Dict[str, Dict], orphaned_files: List[Path]):
     """Generate detailed cleanup report."""
@@ -263,60 +376,457 @@ def generate_report(stale_entries: Dict[str, Dict], orphaned_files: List[Path]):
                 logger.info(f"    ... and {len(files) - 5} more")
         
         logger.info("\n  Note: Orphaned files are NOT automatically deleted.")
-        logger.info("  Review them manually and delete if necessary.")
+        logger.info("  Review them manually, or run with --adopt-orphans to add them to the manifest.")
     else:
         logger.info("\nNo orphaned files found ✓")
     
     logger.info("\n" + "="*60)
 
-def handle_orphaned_files(orphaned_files: List[Path], interactive: bool = False):
+# --- Verification -----------------------------------------------------
+
+# One read buffer per hashing thread, reused across files
+_read_buffers = threading.local()
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file, read unbuffered in VERIFY_READ_SIZE chunks."""
+    digest = hashlib.sha256()
+    buffer = getattr(_read_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _read_buffers.buffer = bytearray(VERIFY_READ_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+def stat_key(path: str) -> Optional[Tuple[int, int, int, int]]:
+    """(device, inode, size, mtime_ns) of a file, or None if it can't be stat'd."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+def hash_if_unchanged(path: str, key: Tuple[int, int, int, int]) -> Optional[str]:
+    """Hash a file; None if it changed (or vanished) while being read."""
+    try:
+        digest = hash_file(path)
+    except OSError as e:
+        logger.warning(f"Cannot read {path}: {e}")
+        return None
+    return digest if stat_key(path) == key else None
+
+def verify_files(
+    store: ManifestStore,
+    manifest: Dict,
+    workers: int = VERIFY_WORKERS,
+) -> Tuple[Dict[str, Tuple[Dict, str]], Dict[str, int]]:
     """
-    Handle orphaned files (files on disk not in manifest).
+    Check every manifest entry's file against its recorded sha256.
+    Files are stat'd and hashed concurrently; a file is only read if its
+    (inode, size, mtime_ns) differ from the hash cache, and hardlinks of
+    one file (shared blobs) are read once. The hash cache is updated in
+    one transaction.
     
-    Args:
-        orphaned_files: List of orphaned file paths
-        interactive: If True, ask user what to do. If False, just report.
+    Returns ({url: (entry, actual_sha256)} for mismatches, counts).
     """
-    if not orphaned_files:
-        return
+    by_path: Dict[str, List[str]] = {}
+    for url, entry in manifest.items():
+        if entry.get("saved_path") and entry.get("sha256"):
+            by_path.setdefault(entry["saved_path"], []).append(url)
     
-    if not interactive:
-        logger.info("\nOrphaned files detected but not handling (non-interactive mode)")
-        logger.info("Run with --interactive flag to handle them")
+    cache = store.hash_cache()
+    paths = list(by_path)
+    counts = {"files": len(paths), "cached": 0, "hashed": 0, "bytes_hashed": 0, "unreadable": 0}
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        keys = dict(zip(paths, pool.map(stat_key, paths)))
+        
+        # One digest per (device, inode): from the cache if any of its paths
+        # is cached under the current stat, otherwise read once
+        digests: Dict[Tuple[int, int, int, int], str] = {}
+        to_hash: Dict[Tuple[int, int, int, int], str] = {}
+        for path, key in keys.items():
+            if key is None:
+                continue
+            cached = cache.get(path)
+            if cached is not None and (cached.inode, cached.size, cached.mtime_ns) == key[1:]:
+                digests[key] = cached.sha256
+            else:
+                to_hash.setdefault(key, path)
+        for key in digests:
+            to_hash.pop(key, None)
+        
+        hashed = zip(to_hash, pool.map(hash_if_unchanged, to_hash.values(), to_hash))
+        for key, digest in hashed:
+            if digest is not None:
+                digests[key] = digest
+                counts["hashed"] += 1
+                counts["bytes_hashed"] += key[2]
+    
+    now = datetime.now(timezone.utc).isoformat()
+    mismatches = {}
+    updates = {}
+    for path, key in keys.items():
+        digest = digests.get(key) if key else None
+        if digest is None:
+            counts["unreadable"] += 1
+            continue
+        cached = cache.get(path)
+        if cached is None or (cached.inode, cached.size, cached.mtime_ns, cached.sha256) != (*key[1:], digest):
+            updates[path] = CachedHash(*key[1:], digest, now)
+        elif key not in to_hash:
+            counts["cached"] += 1
+        for url in by_path[path]:
+            if manifest[url]["sha256"] != digest:
+                mismatches[url] = (manifest[url], digest)
+    
+    store.put_hashes(updates)
+    store.delete_hashes(set(cache) - set(by_path))
+    return mismatches, counts
+
+def report_verification(mismatches: Dict[str, Tuple[Dict, str]], counts: Dict[str, int]):
+    """Log the verification summary and every checksum mismatch."""
+    logger.info(
+        f"\nVerified {counts['files']} files: {counts['cached']} unchanged since last check, "
+        f"{counts['hashed']} hashed ({counts['bytes_hashed'] / 1024 / 1024:.1f} MB)"
+    )
+    if counts["unreadable"]:
+        logger.warning(f"  {counts['unreadable']} files missing, unreadable or modified during the check")
+    if not mismatches:
+        logger.info("✓ All checksums match the manifest")
         return
+    logger.error(f"✗ {len(mismatches)} files do not match their manifest checksum:")
+    for url, (entry, actual) in mismatches.items():
+        logger.error(f"    - {entry['saved_path']}: expected {entry['sha256'][:12]}, found {actual[:12]}")
+    logger.info("  Note: Corrupted files are NOT automatically replaced.")
+
+# --- Orphan Adoption --------------------------------------------------
+
+def infer_program_year(relative_path: Path) -> Tuple[str, str]:
+    """
+    Program and year of a file (path relative to DATA_DIR) from the
+    Program / Year / file layout scrape.py writes, falling back to the file
+    name outside that layout.
+    """
+    from scrape import detect_program_from_filename, extract_year
     
-    logger.info("\nWhat would you like to do with orphaned files?")
-    logger.info("  1. Keep them (do nothing)")
-    logger.info("  2. Delete them")
-    logger.info("  3. Create manifest entries for them (rebuild)")
+    parts = relative_path.parts
+    if len(parts) >= 2:
+        program = parts[0]
+    else:
+        program = detect_program_from_filename(relative_path.name) or "Unknown"
+    year = parts[1] if len(parts) == 3 else extract_year(relative_path.name)
+    return program, year
+
+def known_urls_by_path(store: ManifestStore) -> Dict[str, str]:
+    """
+    Map where scrape.py would save each link in the page cache to its URL,
+    so adopted files get their real URL (and are revalidated) when possible.
+    """
+    from scrape import SAVE_DIR, clean_program_name
+    
+    urls = {}
+    for record in store.pages().values():
+        for item in record.get("links") or []:
+            path = os.path.join(SAVE_DIR, clean_program_name(item["program"]), item["year"], item["filename"])
+            urls.setdefault(os.path.abspath(path), item["url"])
+    return urls
+
+def adopt_blob(path: str, digest: str) -> bool:
+    """
+    Hardlink a file into the blob store unless its content is already
+    there. Returns False if it couldn't be linked.
+    """
+    blob = os.path.join(BLOB_DIR, digest[:2], digest)
+    if os.path.exists(blob):
+        return True
+    try:
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        os.link(path, blob)
+    except FileExistsError:
+        pass
+    except OSError as e:
+        logger.debug(f"Cannot link {path} into the blob store: {e}")
+        return False
+    return True
+
+def hash_orphan(path: str) -> Tuple[Optional[Tuple[int, int, int, int]], Optional[str], bool]:
+    """
+    Stat, hash and blob-link one orphaned file (one worker task).
+    Returns (stat key, sha256, in blob store); sha256 is None if unreadable.
+    """
+    key = stat_key(path)
+    digest = hash_if_unchanged(path, key) if key else None
+    return key, digest, bool(digest) and adopt_blob(path, digest)
+
+def adopt_orphans(store: ManifestStore, orphaned_files: List[Path], workers: int = VERIFY_WORKERS) -> int:
+    """
+    Create manifest entries for untracked files: hash them concurrently,
+    take program/year from their location, and write every entry in one
+    transaction (seeding the hash cache too). Files are keyed by their URL
+    from the page cache when known, otherwise by a file:// URI, and are
+    never moved. Returns number of files adopted.
+    """
+    logger.info(f"\nAdopting {len(orphaned_files)} orphaned files ({workers} workers)...")
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(hash_orphan, map(str, orphaned_files)))
+    
+    known_urls = known_urls_by_path(store)
+    tracked_urls = set(store.entries())
+    data_dir = os.path.relpath(DATA_DIR)
+    blob_dir = os.path.relpath(BLOB_DIR)
+    now = datetime.now(timezone.utc).isoformat()
+    entries = {}
+    hashes = {}
+    
+    for path, (key, digest, in_blob_store) in zip(orphaned_files, results):
+        if digest is None:
+            logger.warning(f"Not adopted (unreadable or modified while hashing): {path}")
+            continue
+        url = known_urls.get(str(path))
+        if url is None or url in tracked_urls or url in entries:
+            url = path.as_uri()
+        
+        relative_path = path.relative_to(DATA_DIR)
+        program, year = infer_program_year(relative_path)
+        saved_path = os.path.join(data_dir, relative_path)
+        entries[url] = {
+            "program": program,
+            "filename": path.name,
+            "year": year,
+            "saved_path": saved_path,
+            "sha256": digest,
+            "size": key[2],
+            "blob_path": os.path.join(blob_dir, digest[:2], digest) if in_blob_store else None,
+            "timestamp": now,
+            "etag": None,
+            "last_modified": None,
+            "adopted": True,
+        }
+        hashes[saved_path] = CachedHash(*key[1:], digest, now)
+        logger.debug(f"Adopted ({program}/{year}): {saved_path}")
+    
+    store.upsert_many(entries)
+    store.put_hashes(hashes)
+    return len(entries)
+
+# --- Watch Mode -------------------------------------------------------
+
+class ManifestWatcher:
+    """
+    Keeps the manifest in sync with the data tree from inotify events:
+    - tracked files deleted (or moved out of the tree) lose their entries
+    - tracked files or directories moved within the tree keep their
+      entries, with saved_path updated
+    - untracked data files that were written or moved in are adopted
+      once settled
+    A full reconcile runs at startup, after the event queue overflows and
+    every WATCH_RESCAN_HOURS.
+    """
     
-    # In automated mode, we should never delete or modify
-    # This is just a placeholder for manual runs
-    logger.warning("Interactive mode not implemented in automated runs")
-    logger.info("Orphaned files will be left as-is")
+    def __init__(self, store: ManifestStore, workers: int = VERIFY_WORKERS):
+        self.store = store
+        self.workers = workers
+        self.data_dir = os.path.relpath(DATA_DIR)
+        self.pending_adopt: Dict[str, float] = {}   # path -> last write (monotonic)
+        self.pending_stale: Set[str] = set()
+        self.rescan_due = 0.0
+    
+    def saved_path(self, path: str) -> str:
+        """The manifest's saved_path for an absolute path in the data tree."""
+        return os.path.join(self.data_dir, os.path.relpath(path, DATA_DIR))
+    
+    def is_data_file(self, path: str) -> bool:
+        parts = os.path.relpath(path, DATA_DIR).split(os.sep)
+        return (
+            path.lower().endswith(DATA_EXTENSIONS)
+            and parts[-1] not in MANIFEST_FILES
+            and not any(part in SKIP_DIRS for part in parts)
+        )
+    
+    # --- Events -------------------------------------------------------
+    
+    def handle(self, events: List):
+        """Queue the changes from one batch of TreeWatcher events."""
+        from inotify_watch import IN_CLOSE_WRITE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO, IN_Q_OVERFLOW
+        
+        now = time.monotonic()
+        moved_from = {}
+        for event in events:
+            if event.mask & IN_Q_OVERFLOW:
+                logger.warning("Event queue overflowed - changes were missed, rescanning")
+                self.rescan_due = 0.0
+            elif event.mask & IN_MOVED_FROM:
+                moved_from[event.cookie] = event
+            elif event.mask & IN_MOVED_TO:
+                source = moved_from.pop(event.cookie, None)
+                moved = source is not None and self.move(source.path, event.path, event.is_dir)
+                if not moved and not event.is_dir:
+                    self.written(event.path, now)
+            elif event.mask & IN_CLOSE_WRITE:
+                self.written(event.path, now)
+            elif event.mask & IN_DELETE:
+                self.deleted(event.path)
+        
+        # Moved out of the tree
+        for source in moved_from.values():
+            self.deleted(source.path)
+    
+    def written(self, path: str, now: float):
+        if self.is_data_file(path):
+            self.pending_adopt[path] = now
+    
+    def deleted(self, path: str):
+        self.pending_stale.add(path)
+        self.pending_adopt.pop(path, None)
+    
+    def move(self, old: str, new: str, is_dir: bool) -> bool:
+        """Re-point entries saved at (or under) old. Returns False if none were."""
+        for path in list(self.pending_adopt):
+            if path == old or path.startswith(old + os.sep):
+                self.pending_adopt[new + path[len(old):]] = self.pending_adopt.pop(path)
+        
+        old_saved, new_saved = self.saved_path(old), self.saved_path(new)
+        if is_dir:
+            entries = self.store.find_under_path(old_saved)
+        else:
+            entries = self.store.find_by_path(old_saved)
+        if not entries:
+            return False
+        
+        moved = {}
+        for url, entry in entries.items():
+            saved_path = new_saved + entry["saved_path"][len(old_saved):]
+            if url.startswith("file://"):
+                # Adopted files are keyed by location
+                url = Path(os.path.abspath(saved_path)).as_uri()
+            moved[url] = {**entry, "saved_path": saved_path, "filename": os.path.basename(saved_path)}
+        self.store.upsert_many(moved)
+        self.store.delete(set(entries) - set(moved))
+        self.store.delete_hashes({entry["saved_path"] for entry in entries.values()})
+        export_manifest(self.store)
+        logger.info(f"✓ Moved {len(moved)} entries: {old_saved} → {new_saved}")
+        return True
+    
+    # --- Applying changes ---------------------------------------------
+    
+    def flush(self):
+        """Drop entries for deleted files and adopt settled new files."""
+        changed = False
+        
+        if self.pending_stale:
+            stale = {}
+            for path in self.pending_stale:
+                saved_path = self.saved_path(path)
+                candidates = {**self.store.find_by_path(saved_path), **self.store.find_under_path(saved_path)}
+                for url, entry in candidates.items():
+                    # Recreated since the event, e.g. by a rescan's adoption
+                    if not os.path.exists(entry["saved_path"]):
+                        stale[url] = entry
+            self.pending_stale.clear()
+            if stale:
+                cleanup_stale_entries(self.store, stale)
+                self.store.delete_hashes({entry["saved_path"] for entry in stale.values()})
+                changed = True
+        
+        now = time.monotonic()
+        settled = [path for path, written in self.pending_adopt.items() if now - written >= WATCH_SETTLE_SECONDS]
+        if settled:
+            for path in settled:
+                del self.pending_adopt[path]
+            orphans = [
+                Path(path) for path in settled
+                if os.path.isfile(path) and not self.store.find_by_path(self.saved_path(path))
+            ]
+            if orphans:
+                adopted = adopt_orphans(self.store, orphans, self.workers)
+                logger.info(f"✓ Adopted {adopted} new files")
+                changed = True
+        
+        if changed:
+            export_manifest(self.store)
+    
+    def rescan(self):
+        """Full reconcile; orphans it finds are queued for adoption."""
+        logger.info("Rescanning the data tree...")
+        stale, orphaned = reconcile(self.store.entries())
+        if stale:
+            cleanup_stale_entries(self.store, stale)
+            self.store.delete_hashes({entry["saved_path"] for entry in stale.values() if entry.get("saved_path")})
+            export_manifest(self.store)
+        now = time.monotonic()
+        for path in orphaned:
+            self.pending_adopt.setdefault(str(path), now)
+        self.rescan_due = now + WATCH_RESCAN_HOURS * 3600
+    
+    def run(self):
+        """Watch until interrupted."""
+        from inotify_watch import TreeWatcher
+        
+        # Watches first, then the scan, so nothing changes unseen in between
+        with TreeWatcher(DATA_DIR, skip=SKIP_DIRS) as watcher:
+            logger.info(f"Watching {DATA_DIR} ({len(watcher.paths)} directories)")
+            while True:
+                if time.monotonic() >= self.rescan_due:
+                    self.rescan()
+                self.handle(watcher.read(timeout=WATCH_FLUSH_SECONDS))
+                self.flush()
+
+def watch_manifest(workers: int = VERIFY_WORKERS) -> int:
+    """Run watch mode until interrupted (Ctrl-C or SIGTERM)."""
+    setup_logging()
+    logger.info("="*60)
+    logger.info(f"Manifest Watch - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info("="*60)
+    
+    store = open_manifest(create=True)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        ManifestWatcher(store, workers).run()
+    except KeyboardInterrupt:
+        logger.info("Watch stopped")
+    except OSError as e:
+        logger.error(f"✗ Watch failed: {e}")
+        return 1
+    finally:
+        store.close()
+    return 0
 
 # --- Main Entry Point -------------------------------------------------
 
-def main():
-    """Main cleanup routine."""
+def main(verify: bool = False, adopt: bool = False, workers: int = VERIFY_WORKERS):
+    """
+    Main cleanup routine. With verify, also re-check file checksums; with
+    adopt, add orphaned files to the manifest.
+    """
+    setup_logging()
     logger.info("="*60)
     logger.info(f"Manifest Cleanup - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info("="*60)
     
     # Load manifest
-    manifest = load_manifest()
-    if not manifest:
+    store = open_manifest(create=adopt)
+    # An empty manifest is only expected when rebuilding it
+    if store is None or (len(store) == 0 and not adopt):
         logger.error("Cannot proceed without valid manifest")
+        if store is not None:
+            store.close()
         return 1
     
+    timings: Dict[str, float] = {}
+    with timed(timings, "load manifest"):
+        manifest = store.entries()
     original_count = len(manifest)
     logger.info(f"Original manifest entries: {original_count}")
     
-    # Find stale entries (in manifest but file missing)
-    stale_entries = find_stale_entries(manifest)
-    
-    # Find orphaned files (file exists but not in manifest)
-    orphaned_files = find_orphaned_files(manifest)
+    # Stale entries (in manifest but file missing) and orphaned files
+    # (file exists but not in manifest), from one walk of the data tree
+    stale_entries, orphaned_files = reconcile(manifest, timings=timings)
     
     # Generate report
     generate_report(stale_entries, orphaned_files)
@@ -324,23 +834,64 @@ def main():
     # Clean up stale entries
     if stale_entries:
         logger.info("\nCleaning stale entries...")
-        cleaned_manifest = cleanup_stale_entries(manifest, stale_entries)
         
-        # Save cleaned manifest atomically
         try:
-            save_manifest_atomic(cleaned_manifest)
+            with timed(timings, "clean"):
+                removed = cleanup_stale_entries(store, stale_entries)
+                export_manifest(store)
             logger.info("✓ Manifest cleaned and saved successfully")
-            logger.info(f"  Removed: {len(stale_entries)} entries")
-            logger.info(f"  Remaining: {len(cleaned_manifest)} entries")
+            logger.info(f"  Removed: {removed} entries")
+            logger.info(f"  Remaining: {len(store)} entries")
         except Exception as e:
             logger.error(f"✗ Failed to save cleaned manifest: {e}")
+            store.close()
             return 1
+        
+        manifest = store.entries()
     else:
         logger.info("\n✓ No cleanup needed - manifest is healthy")
     
-    # Handle orphaned files (just report in automated mode)
-    if orphaned_files:
-        handle_orphaned_files(orphaned_files, interactive=False)
+    # Rebuild entries for files on disk that the manifest doesn't know
+    if orphaned_files and adopt:
+        try:
+            with timed(timings, "adopt"):
+                adopted = adopt_orphans(store, orphaned_files, workers)
+                export_manifest(store)
+            logger.info(f"✓ Adopted {adopted} of {len(orphaned_files)} orphaned files")
+        except Exception as e:
+            logger.error(f"✗ Failed to adopt orphaned files: {e}")
+            store.close()
+            return 1
+        manifest = store.entries()
+    elif orphaned_files:
+        logger.info("\nOrphaned files left as-is (run with --adopt-orphans to add them to the manifest)")
+    
+    # Prune blobs that no longer back any manifest entry
+    with timed(timings, "prune blobs"):
+        unreferenced_blobs = find_unreferenced_blobs(manifest)
+        if unreferenced_blobs:
+            freed = prune_blobs(unreferenced_blobs)
+            logger.info(f"\n✓ Pruned {len(unreferenced_blobs)} unreferenced blobs ({freed / 1024 / 1024:.1f} MB)")
+    
+    # Re-hash files whose content may have changed since the last check
+    mismatches = {}
+    if verify:
+        logger.info(f"\nVerifying checksums ({workers} workers)...")
+        with timed(timings, "verify"):
+            mismatches, counts = verify_files(store, manifest, workers)
+        report_verification(mismatches, counts)
+    
+    store.close()
+    
+    logger.info("\nTimings:")
+    for phase, seconds in timings.items():
+        logger.info(f"  {phase:<14} {seconds:>8.3f}s")
+    
+    if mismatches:
+        logger.error("\n" + "="*60)
+        logger.error(f"Cleanup completed - {len(mismatches)} checksum mismatches found")
+        logger.error("="*60)
+        return EXIT_MISMATCH
     
     logger.info("\n" + "="*60)
     logger.info("Cleanup completed successfully")
@@ -348,5 +899,20 @@ def main():
     
     return 0
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Remove stale manifest entries and report drift.")
+    parser.add_argument("--verify", action="store_true",
+                        help="re-hash files and compare with the manifest checksums")
+    parser.add_argument("--adopt-orphans", action="store_true",
+                        help="add files on disk that the manifest doesn't track (creates the manifest if missing)")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and update the manifest as files change (Linux)")
+    parser.add_argument("--workers", type=int, default=VERIFY_WORKERS,
+                        help=f"threads hashing files for --verify/--adopt-orphans (default: {VERIFY_WORKERS})")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    args = parse_args()
+    if args.watch:
+        exit(watch_manifest(workers=args.workers))
+    exit(main(verify=args.verify, adopt=args.adopt_orphans, workers=args.workers))
\ No newline at end of file
@@ -1,8 +1,379 @@
+import io
 import os
+import shutil
+import hashlib
+import zipfile
+import tempfile
+from datetime import datetime
+
 import pandas as pd
 
 BASE_PATH = "data/PERM Program"
 
+# Archive members that are converted; everything else is only hashed
+MEMBER_EXTS = (".xlsx", ".csv")
+CSV_CHUNK_ROWS = 100_000
+READ_CHUNK_SIZE = 1024 * 1024
+# Workbook members need random access, so they are copied out of the
+# archive first: in memory up to MEMBER_SPOOL_BYTES, then to a temp file
+# in the output directory
+MEMBER_SPOOL_BYTES = 64 * 1024 * 1024
+
+# Workbooks are streamed row by row and written XLSX_BATCH_ROWS rows per
+# Parquet row group, so memory use is bounded by the batch size rather than
+# the workbook size. XLSX_READER picks the parser: "openpyxl" (read-only
+# mode, batch-bounded) or "calamine" (opt-in: needs python-calamine; much
+# faster, but holds the whole sheet's cell values in memory while reading).
+XLSX_BATCH_ROWS = 50_000
+XLSX_READER = "openpyxl"
+
+# pandas' default na_values: cells with these texts become nulls, as they
+# did with pd.read_excel / pd.read_csv
+NA_VALUES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+})
+
+def parquet_path_for(excel_path):
+    return excel_path.replace(".xlsx", ".parquet")
+
+def write_parquet_stream(tables, parquet_path, source="Input"):
+    """
+    Write an iterable of pyarrow Tables (all with the first one's schema)
+    to Parquet, one or more row groups each, via a temp file so readers
+    never see a partial file. Returns row count.
+    """
+    import pyarrow.parquet as pq
+
+    temp_path = parquet_path + ".tmp"
+    writer = None
+    rows = 0
+    try:
+        for table in tables:
+            if writer is None:
+                writer = pq.ParquetWriter(temp_path, table.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+        if writer is None:
+            raise ValueError(f"{source} has no header row")
+        writer.close()
+        os.replace(temp_path, parquet_path)
+    except Exception:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return rows
+
+def convert_file(excel_path, parquet_path=None):
+    """
+    Convert one workbook to Parquet (all columns as strings), streaming it
+    in XLSX_BATCH_ROWS-row batches.
+    Returns (parquet_path, row_count).
+    """
+    parquet_path = parquet_path or parquet_path_for(excel_path)
+    rows = convert_xlsx_stream(excel_path, parquet_path)
+    return parquet_path, rows
+
+# ---------------------------------------------------------
+# Streaming workbook reader
+# ---------------------------------------------------------
+
+class SheetWidened(Exception):
+    """A row is wider than the columns already written; carries the sheet's full width."""
+
+    def __init__(self, width):
+        super().__init__(f"sheet is {width} columns wide")
+        self.width = width
+
+def iter_sheet_rows(source):
+    """
+    Yield the first sheet's rows as tuples of cell values (None for empty
+    cells). source is a path or a seekable binary file.
+    """
+    if XLSX_READER == "calamine":
+        from python_calamine import CalamineWorkbook
+
+        sheet = CalamineWorkbook.from_object(source).get_sheet_by_index(0)
+        for row in sheet.iter_rows():
+            yield tuple(None if value == "" else value for value in row)
+        return
+
+    import openpyxl
+
+    # Same options as pandas.read_excel; read-only mode parses the sheet XML
+    # incrementally instead of building every cell object up front
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        # Don't trust the stored dimensions (often wrong in exported files)
+        sheet.reset_dimensions()
+        yield from sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def cell_text(value):
+    """A cell value as pandas.read_excel(dtype=str) would render it."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def row_cells(row):
+    """A data row as text, NA_VALUES as None, with trailing empty cells trimmed."""
+    cells = [cell_text(value) for value in row]
+    cells = [None if cell in NA_VALUES else cell for cell in cells]
+    while cells and cells[-1] is None:
+        cells.pop()
+    return cells
+
+def header_names(row, width):
+    """
+    Column names from the header row, mangled as pandas does: blanks become
+    "Unnamed: i" and repeats get ".1", ".2" suffixes (named columns first).
+    """
+    names = []
+    named, unnamed = [], []
+    for i in range(width):
+        name = cell_text(row[i]) if i < len(row) else None
+        if name:
+            named.append(i)
+        else:
+            name = f"Unnamed: {i}"
+            unnamed.append(i)
+        names.append(name)
+
+    counts = {}
+    for i in named + unnamed:
+        name = base = names[i]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[base] = count + 1
+            name = f"{base}.{count}"
+            count = count + 1 if name in names else counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+def batch_table(batch, schema):
+    import pyarrow as pa
+
+    width = len(schema)
+    for cells in batch:
+        cells.extend([None] * (width - len(cells)))
+    columns = zip(*batch) if batch else [()] * width
+    return pa.Table.from_arrays([pa.array(list(col), pa.string()) for col in columns], schema=schema)
+
+def xlsx_tables(source, batch_rows=None, width=0):
+    """
+    Yield the first sheet of a workbook as all-string pyarrow Tables of up
+    to batch_rows (default XLSX_BATCH_ROWS) rows, matching
+    pandas.read_excel(dtype=str): the first non-blank row is the header,
+    the sheet is as wide as its widest row (extra columns are "Unnamed: i"),
+    blank rows are kept except trailing ones, and NA_VALUES become nulls.
+
+    The width is settled by the first batch (or the width argument). A
+    wider row after that raises SheetWidened with the sheet's full width,
+    found by reading the remaining rows, so the caller can start over.
+    """
+    import pyarrow as pa
+
+    batch_rows = batch_rows or XLSX_BATCH_ROWS
+    rows = iter_sheet_rows(source)
+    header = None
+    schema = None
+    blank_rows = 0
+    batch = []
+
+    for row in rows:
+        if header is None:
+            header = list(row)
+            while header and cell_text(header[-1]) in (None, ""):
+                header.pop()
+            if header:
+                width = max(width, len(header))
+            else:
+                header = None
+            continue
+
+        cells = row_cells(row)
+        if not cells:
+            blank_rows += 1
+            continue
+        batch.extend([] for _ in range(blank_rows))
+        blank_rows = 0
+        batch.append(cells)
+
+        if len(cells) > width:
+            if schema is not None:
+                width = max([len(cells)] + [len(row_cells(rest)) for rest in rows])
+                raise SheetWidened(width)
+            width = len(cells)
+        if len(batch) >= batch_rows:
+            schema = schema or pa.schema([(name, pa.string()) for name in header_names(header, width)])
+            yield batch_table(batch, schema)
+            batch = []
+
+    if header is not None:
+        schema = schema or pa.schema([(name, pa.string()) for name in header_names(header, width)])
+        yield batch_table(batch, schema)
+
+def convert_xlsx_stream(source, parquet_path, batch_rows=None):
+    """
+    Convert a workbook (path or seekable binary file) to Parquet, one row
+    group per batch, so memory use is bounded by the batch size. A sheet
+    that turns out wider than its first batch is converted again at its
+    full width.
+    Returns row count.
+    """
+    try:
+        return write_parquet_stream(xlsx_tables(source, batch_rows), parquet_path, source="Workbook")
+    except SheetWidened as e:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return write_parquet_stream(xlsx_tables(source, batch_rows, e.width), parquet_path, source="Workbook")
+
+# ---------------------------------------------------------
+# ZIP archives
+# ---------------------------------------------------------
+
+class HashingReader(io.RawIOBase):
+    """
+    Read-only stream that SHA-256 hashes every byte read through it.
+    An exception raised by the underlying stream (e.g. a CRC error) is
+    kept in error, so it can be told apart from the consumer's own errors.
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.error = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        try:
+            data = self._raw.read(len(buffer))
+        except Exception as e:
+            self.error = e
+            raise
+        n = len(data)
+        buffer[:n] = data
+        self.sha256.update(data)
+        self.size += n
+        return n
+
+    def drain(self):
+        """Read (and hash) whatever the consumer left unread."""
+        while self.read(READ_CHUNK_SIZE):
+            pass
+
+def archive_output_dir(zip_path):
+    """Member Parquets of data/.../x.zip go in data/.../x/."""
+    return os.path.splitext(zip_path)[0]
+
+def member_parquet_name(member_name, taken=()):
+    """
+    Flatten a member path into one safe file name ending in .parquet,
+    keeping the source extension (x.csv -> x.csv.parquet). Names already
+    in taken (compared case-insensitively) get a _2, _3 ... suffix.
+    """
+    parts = [p for p in member_name.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    stem = "__".join(parts)
+    name = stem + ".parquet"
+    suffix = 1
+    while name.lower() in taken:
+        suffix += 1
+        name = f"{stem}_{suffix}.parquet"
+    return name
+
+def convert_csv_stream(stream, parquet_path):
+    """
+    Convert a CSV stream to Parquet in CSV_CHUNK_ROWS-row groups, so memory
+    use is bounded by the chunk size rather than the member size.
+    Returns row count.
+    """
+    import pyarrow as pa
+
+    def tables():
+        schema = None
+        for chunk in pd.read_csv(stream, dtype=str, chunksize=CSV_CHUNK_ROWS, encoding_errors="replace"):
+            if schema is None:
+                schema = pa.schema([(str(c), pa.string()) for c in chunk.columns])
+            yield pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+    return write_parquet_stream(tables(), parquet_path, source="CSV member")
+
+def convert_archive(zip_path, output_dir=None):
+    """
+    Convert the spreadsheet members of a ZIP archive to Parquet without
+    extracting it. Members are read one at a time, in archive order,
+    straight from the compressed stream; CSVs are converted as they stream,
+    and workbooks (which need random access) are spooled one at a time
+    (in memory up to MEMBER_SPOOL_BYTES, else to a temp file), then parsed
+    in batches. Every member is hashed while it is read.
+
+    Returns (output_dir, members) where members is a list of
+    {name, size, compressed_size, crc32, modified, sha256, parquet_path,
+    rows, error} dicts; parquet_path is None for members not converted.
+    """
+    output_dir = output_dir or archive_output_dir(zip_path)
+    members = []
+    taken = set()   # lowercased output names, so no two members share one
+
+    with zipfile.ZipFile(zip_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+
+            record = {
+                "name": info.filename,
+                "size": info.file_size,
+                "compressed_size": info.compress_size,
+                "crc32": f"{info.CRC:08x}",
+                "modified": datetime(*info.date_time).isoformat(),
+                "sha256": None,
+                "parquet_path": None,
+                "rows": None,
+                "error": None,
+            }
+            convert = info.filename.lower().endswith(MEMBER_EXTS)
+            parquet_name = member_parquet_name(info.filename, taken)
+            if convert:
+                taken.add(parquet_name.lower())
+            parquet_path = os.path.join(output_dir, parquet_name)
+
+            # zipfile checks each member's CRC once it has been read to the end
+            with archive.open(info) as raw:
+                reader = HashingReader(raw)
+                try:
+                    if convert:
+                        os.makedirs(output_dir, exist_ok=True)
+                        if info.filename.lower().endswith(".csv"):
+                            record["rows"] = convert_csv_stream(io.BufferedReader(reader, READ_CHUNK_SIZE), parquet_path)
+                        else:
+                            with tempfile.SpooledTemporaryFile(MEMBER_SPOOL_BYTES, dir=output_dir) as spool:
+                                shutil.copyfileobj(reader, spool, READ_CHUNK_SIZE)
+                                spool.seek(0)
+                                record["rows"] = convert_xlsx_stream(spool, parquet_path)
+                        record["parquet_path"] = parquet_path
+                except Exception as e:
+                    record["error"] = str(e)
+                # The archive itself is damaged: fail it rather than the member
+                if reader.error is not None:
+                    raise reader.error
+                reader.drain()
+
+            record["sha256"] = reader.sha256.hexdigest()
+            members.append(record)
+
+    return output_dir, members
+
 def convert_all_excels():
     for year in os.listdir(BASE_PATH):
         year_path = os.path.join(BASE_PATH, year)
@@ -10,18 +381,17 @@ def convert_all_excels():
             continue
 
         for file in os.listdir(year_path):
-            if not file.endswith(".xlsx"):
-                continue
-
-            excel_path = os.path.join(year_path, file)
-            parquet_path = excel_path.replace(".xlsx", ".parquet")
+            path = os.path.join(year_path, file)
 
-            print("Converting:", excel_path)
-            df = pd.read_excel(excel_path, dtype=str)
-            df.to_parquet(parquet_path)
+            if file.endswith(".xlsx"):
+                print("Converting:", path)
+                convert_file(path)
+            elif file.endswith(".zip"):
+                print("Converting archive:", path)
+                convert_archive(path)
 
     print("Done converting all PERM XLSX -> Parquet")
-            
+
 
 if __name__ == "__main__":
     convert_all_excels()
@@ -20,6 +20,8 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import glob
 
+from cleanup import EXIT_MISMATCH
+
 # --- Configuration ----------------------------------------------------
 
 PROJECT_DIR = Path(__file__).parent.absolute()
@@ -39,12 +41,22 @@ RUN_AT_LOCAL = "07:00"         # local time
 QUARTERLY_MONTHS = [1, 4, 7, 10]  # Jan, Apr, Jul, Oct (after each quarter ends)
 RUN_DAY_OF_MONTH = 15          # Run mid-month to ensure DOL has published
 
+# Poll every day instead of only on quarterly run days. Cheap because
+# scrape.py skips revalidation when the portal page is unchanged.
+POLL_DAILY = False
+
 # Log retention (cleanup logs older than this)
 LOG_RETENTION_DAYS = 90        # Keep 3 months of logs
 
 # Cleanup schedule - run weekly to remove stale manifest entries
 CLEANUP_SCHEDULE_DAY = "monday"
 CLEANUP_TIME = "03:00"
+# Weekly cleanup also re-verifies checksums; only files that changed since
+# the last check are re-hashed
+CLEANUP_ARGS = ["--verify"]
+# Cleanup exit codes that report a finding rather than a failure: retrying
+# won't change the result, so they are reported right away
+CLEANUP_REPORT_CODES = {EXIT_MISMATCH: "checksum mismatches found"}
 
 # --- Logging Setup ----------------------------------------------------
 
@@ -110,15 +122,18 @@ def cleanup_old_logs():
     else:
         logger.info("No old logs to remove")
 
-def run_script_with_retry(script_path: Path, script_name: str):
+def run_script_with_retry(script_path: Path, script_name: str, args=(), report_codes=None):
     """
     Run a script with retries and exponential backoff.
-    Returns True if successful, False if all retries exhausted.
+    Exit codes in report_codes ({code: reason}) are reported without retrying.
+    Returns True if successful, False if all retries exhausted or reported.
     """
+    report_codes = report_codes or {}
     python_exe = get_python_executable()
+    command = [python_exe, str(script_path), *args]
     
     logger.info(f"Starting {script_name}...")
-    logger.info(f"Command: {python_exe} {script_path}")
+    logger.info(f"Command: {' '.join(command)}")
     
     attempt = 0
     while attempt < MAX_RETRIES:
@@ -128,7 +143,7 @@ def run_script_with_retry(script_path: Path, script_name: str):
             # Run the script and capture output
             # Note: scrape.py has its own logging, so we just capture exit code
             result = subprocess.run(
-                [python_exe, str(script_path)],
+                command,
                 capture_output=True,
                 text=True,
                 timeout=3600  # 1 hour timeout
@@ -138,6 +153,12 @@ def run_script_with_retry(script_path: Path, script_name: str):
                 logger.info(f"{script_name} completed successfully")
                 return True
             
+            if result.returncode in report_codes:
+                reason = report_codes[result.returncode]
+                logger.error(f"{script_name} exited with code {result.returncode}: {reason}")
+                send_failure_notification(script_name, f"{script_name}: {reason}")
+                return False
+            
             # Log failure details
             logger.error(f"{script_name} failed with exit code {result.returncode}")
             if result.stderr:
@@ -164,13 +185,14 @@ def run_script_with_retry(script_path: Path, script_name: str):
     send_failure_notification(script_name)
     return False
 
-def send_failure_notification(script_name: str):
+def send_failure_notification(script_name: str, reason: str = None):
     """
-    Send notification about persistent script failure.
+    Send notification about persistent script failure (or a reported
+    finding, given as reason).
     Implement your notification method here (email, Slack, PagerDuty, etc.)
     """
     message = (
-        f"ALERT: {script_name} failed after {MAX_RETRIES} attempts\n"
+        f"ALERT: {reason or f'{script_name} failed after {MAX_RETRIES} attempts'}\n"
         f"Time: {datetime.now()}\n"
         f"Check logs in: {LOG_DIR}"
     )
@@ -199,10 +221,10 @@ def should_run_quarterly():
     return now.month in QUARTERLY_MONTHS and now.day == RUN_DAY_OF_MONTH
 
 def run_scraper_if_quarter():
-    """Only run if it's the scheduled quarterly day."""
-    if should_run_quarterly():
+    """Only run if it's the scheduled quarterly day (or every day with POLL_DAILY)."""
+    if POLL_DAILY or should_run_quarterly():
         logger.info("="*60)
-        logger.info("QUARTERLY SCRAPE TRIGGERED")
+        logger.info("DAILY POLL TRIGGERED" if POLL_DAILY else "QUARTERLY SCRAPE TRIGGERED")
         logger.info("="*60)
         success = run_script_with_retry(SCRIPT_PATH, "scrape.py")
         
@@ -225,7 +247,7 @@ def run_cleanup():
         logger.warning(f"Cleanup script not found: {CLEANUP_SCRIPT_PATH}")
         return
     
-    run_script_with_retry(CLEANUP_SCRIPT_PATH, "cleanup.py")
+    run_script_with_retry(CLEANUP_SCRIPT_PATH, "cleanup.py", CLEANUP_ARGS, CLEANUP_REPORT_CODES)
 
 def run_log_cleanup():
     """Scheduled log cleanup task."""
@@ -241,7 +263,10 @@ def main():
     logger.info("="*60)
     logger.info("DOL Data Scraper - Quarterly Cron Scheduler")
     logger.info("="*60)
-    logger.info(f"Scrape Schedule: {RUN_DAY_OF_MONTH}th of {QUARTERLY_MONTHS} at {RUN_AT_LOCAL}")
+    if POLL_DAILY:
+        logger.info(f"Scrape Schedule: Daily at {RUN_AT_LOCAL}")
+    else:
+        logger.info(f"Scrape Schedule: {RUN_DAY_OF_MONTH}th of {QUARTERLY_MONTHS} at {RUN_AT_LOCAL}")
     logger.info(f"Cleanup Schedule: Every {CLEANUP_SCHEDULE_DAY.title()} at {CLEANUP_TIME}")
     logger.info(f"Log Retention: {LOG_RETENTION_DAYS} days")
     logger.info(f"Python: {get_python_executable()}")
@@ -0,0 +1,212 @@
+"""
+http_session.py — The HTTP transport behind scrape.get_session().
+
+Features:
+- Keep-alive connection pooling shared across worker threads
+- Per-host throttling of every request (see throttle.py), fed back with
+  each response's status and time-to-headers
+- Retries with exponential backoff on connection errors and 429/5xx,
+  honoring Retry-After, with throttling responses reported to the host
+- Connection timing (DNS vs. TCP/TLS connect) for per-file telemetry
+
+Imported on first use by scrape.py, so `import scrape` doesn't pay for
+requests/urllib3.
+"""
+
+import time
+import socket
+import logging
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.connection import allowed_gai_family
+from urllib3.exceptions import ConnectTimeoutError, InvalidHeader, NewConnectionError
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import telemetry
+from throttle import HostThrottle, OVERLOAD_STATUSES
+
+logger = logging.getLogger("scraper")
+
+# host name -> that host's throttle
+ThrottleLookup = Callable[[str], HostThrottle]
+
+# --- Connection timing ------------------------------------------------
+
+class _TimedConnectionMixin:
+    """
+    Times name resolution and connection setup for the tracked file. The
+    host is resolved here so DNS and TCP can be measured separately, then
+    each resolved address is tried in turn (as urllib3 does) until one
+    connects; TLS is part of connect.
+    """
+
+    _dns_seconds = 0.0
+
+    def _new_conn(self):
+        if telemetry.current() is None:
+            return super()._new_conn()
+
+        start = time.monotonic()
+        host = self._dns_host
+        try:
+            infos = socket.getaddrinfo(host.strip("[]"), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            # Let urllib3 resolve again and raise its own error
+            return super()._new_conn()
+        self._dns_seconds = time.monotonic() - start
+        telemetry.add("dns_seconds", self._dns_seconds)
+
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        if not addresses:
+            return super()._new_conn()
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError):
+                    if i == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        self._dns_seconds = 0.0
+        start = time.monotonic()
+        super().connect()
+        telemetry.add("connect_seconds", time.monotonic() - start - self._dns_seconds)
+        telemetry.add("connections_opened", 1)
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+# --- Throttling -------------------------------------------------------
+
+def retry_after_seconds(retry: Retry, value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After value, either delay-seconds or an
+    HTTP-date, capped at the policy's retry_after_max. None if absent or
+    unparseable.
+    """
+    if not value:
+        return None
+    try:
+        return retry.parse_retry_after(value)
+    except InvalidHeader:
+        return None
+
+class ThrottledAdapter(HTTPAdapter):
+    """
+    Transport adapter that waits for the host's rate limit before every
+    request and feeds each response's status and time-to-headers back into
+    the host's concurrency controller. Connections are timed for telemetry.
+    """
+
+    def __init__(self, throttle_for: ThrottleLookup, **kwargs):
+        self.throttle_for = throttle_for
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        throttle = self.throttle_for(urlsplit(request.url).hostname)
+        throttle.wait()
+        record = telemetry.current()
+        setup_before = record["dns_seconds"] + record["connect_seconds"] if record else 0.0
+
+        start = time.monotonic()
+        response = super().send(request, **kwargs)
+        elapsed = time.monotonic() - start
+
+        throttle.record(
+            response.status_code,
+            elapsed,
+            retry_after_seconds(self.max_retries, response.headers.get("Retry-After")),
+        )
+        if record:
+            # Time to headers, not counting new connections made on the way
+            setup = record["dns_seconds"] + record["connect_seconds"] - setup_before
+            record["ttfb_seconds"] += max(0.0, elapsed - setup)
+            record["status_code"] = response.status_code
+            retries = getattr(response.raw, "retries", None)
+            if retries is not None:
+                record["http_retries"] += len(retries.history)
+        return response
+
+class ThrottledRetry(Retry):
+    """
+    Retry policy that reports 429/503 responses to the host's throttle
+    before urllib3 retries them, so other threads back off too.
+    """
+
+    def __init__(self, *args, throttle_for: ThrottleLookup = None, **kwargs):
+        self.throttle_for = throttle_for
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kwargs):
+        # urllib3 makes a fresh Retry per attempt; carry the lookup over
+        retry = super().new(**kwargs)
+        retry.throttle_for = self.throttle_for
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if (
+            self.throttle_for is not None and response is not None
+            and _pool is not None and response.status in OVERLOAD_STATUSES
+        ):
+            throttle = self.throttle_for(_pool.host)
+            throttle.backoff(retry_after_seconds(self, response.headers.get("Retry-After")))
+            logger.warning(
+                f"Server busy ({response.status}) on {_pool.host}; "
+                f"connection limit now {int(throttle.concurrency.limit)}"
+            )
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+# --- Session ----------------------------------------------------------
+
+def build_session(
+    throttle_for: ThrottleLookup,
+    pool_size: int,
+    retries: int,
+    backoff_factor: float,
+    retry_statuses,
+) -> requests.Session:
+    """Create a pooled, throttled, retrying session for http and https."""
+    retry = ThrottledRetry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=retry_statuses,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+        throttle_for=throttle_for,
+    )
+    adapter = ThrottledAdapter(
+        throttle_for,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
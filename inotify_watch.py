@@ -0,0 +1,231 @@
+"""
+inotify_watch.py — Recursive Linux inotify watches for the data tree.
+
+Features:
+- Thin ctypes binding to inotify(7) (no third-party dependency)
+- Recursive watches that follow directories as they are created, moved
+  and deleted
+- Files written into a new directory before its watch was added are
+  reported too, so nothing created during setup is missed
+- Non-blocking reads with a timeout, returning whole batches of events
+
+Linux only: creating an Inotify raises OSError elsewhere.
+"""
+
+import os
+import errno
+import ctypes
+import select
+import struct
+import ctypes.util
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# --- inotify(7) -------------------------------------------------------
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# Files finished or moved in/out, plus directory changes to follow
+TREE_EVENTS = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW
+)
+
+_EVENT_HEADER = struct.Struct("iIII")   # wd, mask, cookie, len
+READ_SIZE = 64 * 1024
+
+class RawEvent(NamedTuple):
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+class Event(NamedTuple):
+    """One change under the watched tree. path is absolute."""
+    mask: int
+    cookie: int
+    path: str
+
+    @property
+    def is_dir(self) -> bool:
+        return bool(self.mask & IN_ISDIR)
+
+_libc = None
+
+def libc():
+    global _libc
+    if _libc is None:
+        lib = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(lib, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        _libc = lib
+    return _libc
+
+class Inotify:
+    """An inotify instance: add/remove watches and read raw events."""
+
+    def __init__(self):
+        self.fd = libc().inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = libc().inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        # Fails harmlessly if the kernel already dropped the watch
+        libc().inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: Optional[float] = None) -> List[RawEvent]:
+        """Wait up to timeout seconds for events, then drain all queued ones."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self.fd, READ_SIZE)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append(RawEvent(wd, mask, cookie, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# --- Recursive watches ------------------------------------------------
+
+class TreeWatcher:
+    """
+    Watches a directory tree, adding and dropping per-directory watches as
+    directories come and go. Directories named in skip are not watched.
+    """
+
+    def __init__(self, root: str, skip: Iterable[str] = (), mask: int = TREE_EVENTS):
+        self.root = os.path.abspath(root)
+        self.skip = set(skip)
+        self.mask = mask
+        self.inotify = Inotify()
+        self.paths: Dict[int, str] = {}    # wd -> directory
+        self.add_tree(self.root)
+
+    def close(self):
+        self.inotify.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_tree(self, top: str) -> List[str]:
+        """Watch top and every directory below it. Returns the files found."""
+        files = []
+        pending = [top]
+        while pending:
+            directory = pending.pop()
+            try:
+                self.paths[self.inotify.add_watch(directory, self.mask)] = directory
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.skip:
+                                pending.append(entry.path)
+                        elif entry.is_file():
+                            files.append(entry.path)
+            except OSError as e:
+                # Out of watches (fs.inotify.max_user_watches) is fatal;
+                # otherwise it's gone again already, or not a directory
+                if e.errno == errno.ENOSPC:
+                    raise
+                continue
+        return files
+
+    def _drop_tree(self, top: str):
+        for wd, path in list(self.paths.items()):
+            if path == top or path.startswith(top + os.sep):
+                self.inotify.rm_watch(wd)
+                del self.paths[wd]
+
+    def _move_tree(self, old: str, new: str):
+        # Watches follow the inode, so only the recorded paths change
+        for wd, path in self.paths.items():
+            if path == old or path.startswith(old + os.sep):
+                self.paths[wd] = new + path[len(old):]
+
+    def read(self, timeout: Optional[float] = None) -> List[Event]:
+        """
+        Wait up to timeout seconds and return the batch of events, with
+        directory watches already updated. Files found in newly watched
+        directories are reported as IN_CLOSE_WRITE events. An IN_Q_OVERFLOW
+        event (path = root) means events were lost.
+        """
+        events = []
+        moved_dirs: Dict[int, str] = {}
+
+        for raw in self.inotify.read(timeout):
+            if raw.mask & IN_Q_OVERFLOW:
+                events.append(Event(raw.mask, 0, self.root))
+                continue
+            directory = self.paths.get(raw.wd)
+            if raw.mask & IN_IGNORED:
+                self.paths.pop(raw.wd, None)
+                continue
+            if directory is None or raw.mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                continue
+
+            path = os.path.join(directory, raw.name)
+            events.append(Event(raw.mask, raw.cookie, path))
+            if not raw.mask & IN_ISDIR or raw.name in self.skip:
+                continue
+
+            if raw.mask & IN_CREATE:
+                events.extend(Event(IN_CLOSE_WRITE, 0, f) for f in self.add_tree(path))
+            elif raw.mask & IN_MOVED_FROM:
+                moved_dirs[raw.cookie] = path
+            elif raw.mask & IN_MOVED_TO:
+                old = moved_dirs.pop(raw.cookie, None)
+                if old is not None:
+                    self._move_tree(old, path)
+                else:
+                    events.extend(Event(IN_CLOSE_WRITE, 0, f) for f in self.add_tree(path))
+
+        # Moved out of the tree: stop watching
+        for old in moved_dirs.values():
+            self._drop_tree(old)
+        return events
@@ -0,0 +1,328 @@
+"""
+manifest_store.py — SQLite-backed manifest shared by scrape.py and cleanup.py.
+
+Features:
+- One row per URL in an embedded SQLite database (WAL mode)
+- Indexed lookups by url, saved_path, sha256 and program/year
+- Transactional per-file upserts (no whole-file rewrites): each commit is
+  one fsync'd append to the write-ahead log, replayed on open after a crash
+- WAL compaction into the main database at a size threshold and on demand
+- One-time import of an existing manifest.json
+- Atomic JSON export (with backup) for tools that read manifest.json
+- Page cache (validators + extracted links) for scraped index pages
+- Hash cache: last verified SHA-256 per file, keyed by (inode, size, mtime_ns)
+"""
+
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, NamedTuple, Optional, Set
+
+# --- Schema -----------------------------------------------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url         TEXT PRIMARY KEY,
+    saved_path  TEXT,
+    sha256      TEXT,
+    program     TEXT,
+    year        TEXT,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_saved_path ON entries(saved_path);
+CREATE INDEX IF NOT EXISTS idx_entries_sha256 ON entries(sha256);
+CREATE INDEX IF NOT EXISTS idx_entries_program_year ON entries(program, year);
+CREATE TABLE IF NOT EXISTS pages (
+    url         TEXT PRIMARY KEY,
+    data        TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hash_cache (
+    path        TEXT PRIMARY KEY,
+    inode       INTEGER NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    sha256      TEXT NOT NULL,
+    verified_at TEXT NOT NULL
+);
+"""
+
+UPSERT_SQL = """
+INSERT INTO entries (url, saved_path, sha256, program, year, data)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(url) DO UPDATE SET
+    saved_path = excluded.saved_path,
+    sha256 = excluded.sha256,
+    program = excluded.program,
+    year = excluded.year,
+    data = excluded.data
+"""
+
+# Write-ahead log compaction: SQLite checkpoints the WAL back into the main
+# database once it holds this many pages (4 KiB each); compact() does it on
+# demand, and the WAL file is truncated to WAL_SIZE_LIMIT bytes afterwards
+CHECKPOINT_PAGES = 1000
+WAL_SIZE_LIMIT = 4 * 1024 * 1024
+
+# --- Store ------------------------------------------------------------
+
+class CachedHash(NamedTuple):
+    """A file's SHA-256 as of the stat it was hashed under."""
+    inode: int
+    size: int
+    mtime_ns: int
+    sha256: str
+    verified_at: str
+
+def load_json_manifest(path: str) -> Optional[Dict]:
+    """
+    Load a manifest.json, falling back to its .bak copy.
+    Returns None if neither exists or both are corrupted.
+    """
+    for candidate in (path, f"{path}.bak"):
+        if not os.path.exists(candidate):
+            continue
+        try:
+            with open(candidate, "r") as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+class ManifestStore:
+    """
+    Manifest entries keyed by URL, stored in SQLite.
+
+    Entries are plain dicts with the same fields as manifest.json. Each
+    upsert/delete is its own transaction, appended to the WAL and fsync'd
+    before it returns (durable=True), so a crash or power loss never loses
+    more than the entry being written. durable=False skips the per-commit
+    fsync; the database still can't be corrupted, but the last commits may
+    be lost on power failure. Safe to share between threads.
+    """
+
+    def __init__(self, db_path: str, durable: bool = True):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if durable else 'NORMAL'}")
+        self._conn.execute(f"PRAGMA wal_autocheckpoint={CHECKPOINT_PAGES}")
+        self._conn.execute(f"PRAGMA journal_size_limit={WAL_SIZE_LIMIT}")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def compact(self) -> int:
+        """
+        Checkpoint the write-ahead log into the main database and truncate
+        it. Returns the size in bytes of the WAL that was folded in, or 0 if
+        another connection kept it from being truncated.
+        """
+        wal_path = f"{self.db_path}-wal"
+        with self._lock:
+            wal_size = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+            busy = self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+        return 0 if busy else wal_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __contains__(self, url: str) -> bool:
+        return self.get(url) is not None
+
+    # --- Reads --------------------------------------------------------
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the entry for a URL, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _select(self, where: str, params: tuple) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT url, data FROM entries WHERE {where}", params
+            ).fetchall()
+        return {url: json.loads(data) for url, data in rows}
+
+    def find_by_path(self, saved_path: str) -> Dict[str, Dict]:
+        """Entries saved at the given path."""
+        return self._select("saved_path = ?", (saved_path,))
+
+    def find_under_path(self, directory: str) -> Dict[str, Dict]:
+        """Entries saved anywhere below a directory (an indexed range scan)."""
+        prefix = directory.rstrip(os.sep) + os.sep
+        upper = prefix[:-1] + chr(ord(os.sep) + 1)
+        return self._select("saved_path >= ? AND saved_path < ?", (prefix, upper))
+
+    def find_by_sha256(self, digest: str) -> Dict[str, Dict]:
+        """Entries whose content has the given SHA-256."""
+        return self._select("sha256 = ?", (digest,))
+
+    def find_by_program_year(self, program: str, year: Optional[str] = None) -> Dict[str, Dict]:
+        """Entries for a program, optionally limited to one year."""
+        if year is None:
+            return self._select("program = ?", (program,))
+        return self._select("program = ? AND year = ?", (program, year))
+
+    def saved_paths(self) -> Set[str]:
+        """All saved_path values, for O(1) membership checks during a run."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT saved_path FROM entries WHERE saved_path IS NOT NULL"
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def entries(self) -> Dict[str, Dict]:
+        """All entries as a {url: entry} dict, in insertion order."""
+        return self._select("1 ORDER BY rowid", ())
+
+    # --- Writes -------------------------------------------------------
+
+    def upsert(self, url: str, entry: Dict):
+        """Insert or replace one entry in its own transaction."""
+        self.upsert_many({url: entry})
+
+    def upsert_many(self, entries: Dict[str, Dict]):
+        """Insert or replace several entries in a single transaction."""
+        rows = [
+            (
+                url,
+                entry.get("saved_path"),
+                entry.get("sha256"),
+                entry.get("program"),
+                entry.get("year"),
+                json.dumps(entry),
+            )
+            for url, entry in entries.items()
+        ]
+        with self._lock:
+            with self._transaction():
+                self._conn.executemany(UPSERT_SQL, rows)
+
+    def delete(self, urls: Iterable[str]) -> int:
+        """Delete entries in a single transaction. Returns rows removed."""
+        params = [(url,) for url in urls]
+        with self._lock:
+            with self._transaction():
+                cursor = self._conn.executemany("DELETE FROM entries WHERE url = ?", params)
+        return cursor.rowcount
+
+    @contextmanager
+    def _transaction(self):
+        # isolation_level=None puts sqlite3 in autocommit mode; manage
+        # transactions explicitly so each write batch is atomic
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    # --- Page cache ---------------------------------------------------
+
+    def get_page(self, url: str) -> Optional[Dict]:
+        """Return the cached record for a scraped page, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def pages(self) -> Dict[str, Dict]:
+        """All cached page records as {url: record}."""
+        with self._lock:
+            rows = self._conn.execute("SELECT url, data FROM pages").fetchall()
+        return {url: json.loads(data) for url, data in rows}
+
+    def put_page(self, url: str, record: Dict):
+        """Insert or replace the cached record for a scraped page."""
+        with self._lock:
+            with self._transaction():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pages (url, data) VALUES (?, ?)",
+                    (url, json.dumps(record)),
+                )
+
+    # --- Hash cache ---------------------------------------------------
+
+    def hash_cache(self) -> Dict[str, CachedHash]:
+        """All cached file hashes as {path: CachedHash}."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, inode, size, mtime_ns, sha256, verified_at FROM hash_cache"
+            ).fetchall()
+        return {row[0]: CachedHash(*row[1:]) for row in rows}
+
+    def put_hashes(self, hashes: Dict[str, CachedHash]):
+        """Insert or replace cached hashes in a single transaction."""
+        rows = [(path, *cached) for path, cached in hashes.items()]
+        with self._lock:
+            with self._transaction():
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO hash_cache "
+                    "(path, inode, size, mtime_ns, sha256, verified_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+    def delete_hashes(self, paths: Iterable[str]) -> int:
+        """Drop cached hashes for paths in a single transaction. Returns rows removed."""
+        params = [(path,) for path in paths]
+        with self._lock:
+            with self._transaction():
+                cursor = self._conn.executemany("DELETE FROM hash_cache WHERE path = ?", params)
+        return cursor.rowcount
+
+    # --- JSON compatibility -------------------------------------------
+
+    def import_json(self, path: str) -> int:
+        """
+        Import a manifest.json (or its .bak) into the store.
+        Returns number of entries imported.
+        """
+        manifest = load_json_manifest(path)
+        if not manifest:
+            return 0
+        self.upsert_many(manifest)
+        return len(manifest)
+
+    def export_json(self, path: str):
+        """
+        Atomically write all entries to a manifest.json, keeping the previous
+        file as .bak. Uses atomic write pattern: write to temp file, then rename.
+        """
+        if os.path.exists(path):
+            shutil.copy2(path, f"{path}.bak")
+
+        temp_fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or ".",
+            prefix=".manifest_",
+            suffix=".json.tmp"
+        )
+
+        try:
+            with os.fdopen(temp_fd, 'w') as f:
+                json.dump(self.entries(), f, indent=2)
+            shutil.move(temp_path, path)
+        except Exception:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
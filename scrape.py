@@ -4,26 +4,45 @@ from: https://www.dol.gov/agencies/eta/foreign-labor/performance
 
 Features:
 - Groups files by Program // Year // File
-- Deduplicates using manifest.json
+- Deduplicates using an indexed SQLite manifest (exported to manifest.json)
+- Content-addressed blob store: identical files share one copy on disk
 - Skips deprecated Annual Reports
-- Atomic writes with rollback support
+- Atomic, streaming writes with rollback support
+- Resumable downloads (HTTP Range) for large files
 - Versioned logging
 - Manifest recovery (delegates cleanup to cleanup.py)
+- Concurrent downloads with a bounded worker pool and per-host connection cap
+- Shared keep-alive HTTP session with retries on 429/5xx
+- Index-page fingerprinting: unchanged portal runs only spot-check known files
+- Optional bounded crawl of same-site program sub-pages
+- Side-effect-free import: directories, log files and the HTTP/HTML stack
+  are set up on first use
 """
 
+from __future__ import annotations
+
 import os
 import re
+import sys
 import json
+import time
+import random
 import hashlib
-import requests
-import shutil
+import argparse
 import logging
-from bs4 import BeautifulSoup
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from urllib.parse import urljoin, urlsplit, urlunsplit
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Optional
-import tempfile
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from manifest_store import ManifestStore
+from throttle import HostThrottle, TokenBucket
+import telemetry
+
+if TYPE_CHECKING:
+    import requests
 
 # ---------------------------------------------------------------------
 # Configuration
@@ -33,6 +52,76 @@ BASE_URL = "https://www.dol.gov/agencies/eta/foreign-labor/performance"
 SAVE_DIR = "data"
 VALID_EXTS = (".xlsx", ".csv", ".pdf", ".docx", ".doc", ".zip", ".xls")
 
+# Concurrency: worker threads for downloads, and simultaneous connections per
+# host. The per-host limit starts at INITIAL_CONNECTIONS_PER_HOST and adapts
+# (AIMD) between 1 and MAX_CONNECTIONS_PER_HOST: it ramps up while responses
+# arrive within LATENCY_TARGET seconds and is cut back on 429/503 or slow
+# responses
+DOWNLOAD_WORKERS = 4
+INITIAL_CONNECTIONS_PER_HOST = 2
+MAX_CONNECTIONS_PER_HOST = 4
+LATENCY_TARGET = 2.0
+
+# Politeness: at most REQUESTS_PER_SECOND requests per host (bursts of up to
+# REQUEST_BURST), and an optional cap on total download bandwidth in
+# bytes/second (None = unlimited). A Retry-After from the server pauses all
+# requests to that host.
+REQUESTS_PER_SECOND = 2.0
+REQUEST_BURST = 4
+BANDWIDTH_LIMIT = None
+
+# Pipeline mode (--convert): each downloaded workbook in CONVERT_PROGRAMS is
+# converted to Parquet by a pool of CONVERT_WORKERS processes while the
+# remaining downloads continue. Conversions are tracked in the manifest, so
+# only new or changed files are converted. ZIP archives are converted member
+# by member without extracting them, and each member's hash is recorded.
+CONVERT_WORKERS = 2
+CONVERT_PROGRAMS = ("PERM Program",)
+CONVERT_EXTS = (".xlsx", ".zip")
+
+# Telemetry: per-run JSON metrics (per-file timings, bytes, results) go to
+# METRICS_DIR; PROMETHEUS_TEXTFILE is rewritten each run for node_exporter's
+# textfile collector (point it at the collector directory, or None to skip)
+METRICS_DIR = os.path.join(SAVE_DIR, "metrics")
+PROMETHEUS_TEXTFILE = os.path.join(METRICS_DIR, "scrape.prom")
+
+# Shared HTTP session: keep-alive pool size and transport-level retries
+HTTP_POOL_SIZE = 10
+HTTP_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 1.0   # sleeps 1s, 2s, 4s ... between retries
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+HTTP_TIMEOUT = 30
+
+# Streaming download chunk size (bytes); bounds memory per in-flight download
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Resumable downloads: partial files are checkpointed to a sidecar every
+# PARTIAL_CHECKPOINT_BYTES and resumed with a Range request, up to
+# DOWNLOAD_RESUME_ATTEMPTS times per run (and on later runs)
+PARTIAL_CHECKPOINT_BYTES = 16 * 1024 * 1024
+DOWNLOAD_RESUME_ATTEMPTS = 3
+
+# ioctl(2) request that clones a file's extents (linux/fs.h); used when the
+# data tree can't hardlink into the blob store
+FICLONE = 0x40049409
+
+# Index fingerprinting: when the portal page and its extracted link set are
+# unchanged since the last clean run, only a random sample of known files is
+# revalidated, with a full revalidation at least every FULL_REVALIDATION_DAYS
+REVALIDATION_SAMPLE_SIZE = 10
+FULL_REVALIDATION_DAYS = 7
+
+# Crawl mode: follow same-site links from BASE_URL up to CRAWL_MAX_DEPTH hops
+# (0 = only BASE_URL), fetching up to CRAWL_MAX_PAGES pages concurrently.
+# Pages must be on an allowed host and under the path prefix; by default
+# that is BASE_URL's host and parent directory.
+CRAWL_MAX_DEPTH = 0
+CRAWL_MAX_PAGES = 200
+CRAWL_WORKERS = 4
+CRAWL_ALLOWED_DOMAINS = ()
+CRAWL_PATH_PREFIX = None
+
 # Skip deprecated annual reports
 SKIP_PATTERNS = [
     "annual performance report",
@@ -63,21 +152,42 @@ PROGRAM_MAP = {
     "cw1": "CW-1 Program",
 }
 
-os.makedirs(SAVE_DIR, exist_ok=True)
+# Matchers prepared once at import: program keys in priority order and skip
+# patterns. Plain substring checks over these tuples benchmark faster in
+# CPython than one alternation regex over the same literals
+# (see benchmarks/bench_classifier.py).
+_PROGRAM_KEYS = tuple(PROGRAM_MAP.items())
+_SKIP_PATTERNS = tuple(SKIP_PATTERNS)
+
+# Headings that name the program for links in the section below them
+SECTION_TAGS = ("h2", "h3", "h4", "strong", "b")
+
 manifest_path = os.path.join(SAVE_DIR, "manifest.json")
+manifest_db_path = os.path.join(SAVE_DIR, "manifest.db")
+blob_dir = os.path.join(SAVE_DIR, ".blobs")
 log_dir = os.path.join(SAVE_DIR, "logs")
-os.makedirs(log_dir, exist_ok=True)
 
 # ---------------------------------------------------------------------
 # Logging Setup
 # ---------------------------------------------------------------------
 
+# Configured by setup_logging() when a run starts, not at import
+logger = logging.getLogger("scraper")
+_logging_ready = False
+
 def setup_logging():
-    """Setup versioned logging to file and console."""
+    """
+    Setup versioned logging to file and console. Called by each entry point;
+    later calls return the already configured logger.
+    """
+    global _logging_ready
+    if _logging_ready:
+        return logger
+    
+    os.makedirs(log_dir, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_file = os.path.join(log_dir, f"scrape_{timestamp}.log")
     
-    logger = logging.getLogger("scraper")
     logger.setLevel(logging.DEBUG)
     logger.handlers = []
     
@@ -100,10 +210,9 @@ def setup_logging():
     logger.addHandler(console_handler)
     
     logger.info(f"Logging to: {log_file}")
+    _logging_ready = True
     return logger
 
-logger = setup_logging()
-
 # ---------------------------------------------------------------------
 # Utilities
 # ---------------------------------------------------------------------
@@ -119,78 +228,49 @@ def normalize_url(url: str) -> str:
         parsed.fragment,
     ))
 
-def load_manifest() -> Dict:
+def open_manifest() -> ManifestStore:
     """
-    Load manifest.json with fallback to backup.
+    Open the SQLite manifest store, importing manifest.json (or its backup)
+    the first time so existing installs carry over.
     
     Note: Manifest validation/cleanup is handled by cleanup.py.
-    This function just loads the manifest or creates empty one.
+    This function just opens the manifest or creates an empty one.
     """
-    # Try primary manifest
-    if os.path.exists(manifest_path):
-        try:
-            with open(manifest_path, "r") as f:
-                manifest = json.load(f)
-                logger.info(f"Loaded {len(manifest)} entries from manifest")
-                return manifest
-        except json.JSONDecodeError as e:
-            logger.error(f"Manifest corrupted: {e}")
-            
-            # Try backup
-            backup_path = f"{manifest_path}.bak"
-            if os.path.exists(backup_path):
-                logger.info("Attempting to restore from backup...")
-                try:
-                    with open(backup_path, "r") as f:
-                        manifest = json.load(f)
-                        logger.info(f"Restored {len(manifest)} entries from backup")
-                        return manifest
-                except json.JSONDecodeError:
-                    logger.error("Backup also corrupted")
-    
-    # Return empty manifest if nothing exists or all corrupted
-    logger.warning("No valid manifest found - starting fresh")
-    logger.info("Tip: Run cleanup.py after scraping to validate manifest")
-    return {}
-
-def save_manifest(manifest: Dict):
-    """
-    Atomically save manifest.json with backup.
-    Uses atomic write pattern: write to temp file, then rename.
-    """
-    # Create backup of existing manifest
-    if os.path.exists(manifest_path):
-        backup_path = f"{manifest_path}.bak"
-        try:
-            shutil.copy2(manifest_path, backup_path)
-            logger.debug(f"Created manifest backup")
-        except Exception as e:
-            logger.error(f"Failed to create manifest backup: {e}")
-    
-    # Write to temporary file first (atomic write pattern)
-    temp_fd, temp_path = tempfile.mkstemp(
-        dir=SAVE_DIR,
-        prefix=".manifest_",
-        suffix=".json.tmp"
-    )
+    os.makedirs(SAVE_DIR, exist_ok=True)
+    store = ManifestStore(manifest_db_path)
     
+    has_json = os.path.exists(manifest_path) or os.path.exists(f"{manifest_path}.bak")
+    if len(store) == 0 and has_json:
+        imported = store.import_json(manifest_path)
+        if imported:
+            logger.info(f"Imported {imported} entries from {manifest_path}")
+        else:
+            logger.error("Manifest JSON and backup are both corrupted")
+    
+    if len(store):
+        logger.info(f"Loaded {len(store)} entries from manifest")
+    else:
+        logger.warning("No valid manifest found - starting fresh")
+        logger.info("Tip: Run cleanup.py after scraping to validate manifest")
+    return store
+
+def export_manifest(store: ManifestStore):
+    """Export the manifest store to manifest.json for compatibility."""
     try:
-        with os.fdopen(temp_fd, 'w') as f:
-            json.dump(manifest, f, indent=2)
-        
-        # Atomic rename
-        shutil.move(temp_path, manifest_path)
-        logger.debug("Manifest saved atomically")
-        
+        store.export_json(manifest_path)
+        logger.debug(f"Manifest exported to {manifest_path}")
     except Exception as e:
-        # Clean up temp file on error
-        try:
-            os.unlink(temp_path)
-        except:
-            pass
-        logger.error(f"Failed to save manifest: {e}")
+        logger.error(f"Failed to export manifest: {e}")
         raise
 
+def compact_manifest(store: ManifestStore):
+    """Fold the run's write-ahead log back into manifest.db."""
+    try:
+        compacted = store.compact()
+        logger.debug(f"Manifest compacted ({compacted} bytes of log)")
+    except Exception as e:
+        logger.warning(f"Failed to compact manifest: {e}")
+
 def clean_program_name(name):
     """Sanitize and truncate overly long folder names."""
     name = re.sub(r"[\\/*?:\"<>|]", "_", name.strip())
@@ -207,34 +287,44 @@ def extract_year(filename):
     match = re.search(r"(19|20)\d{2}", filename)
     return match.group(0) if match else "unknown_year"
 
-def detect_program_from_filename(filename):
-    """Detect program from filename as fallback."""
-    filename_lower = filename.lower()
-    
-    for key, val in PROGRAM_MAP.items():
-        if key in filename_lower:
+def program_from_text(text):
+    """Return the first program whose key appears in lowercased text, or None."""
+    for key, val in _PROGRAM_KEYS:
+        if key in text:
             return val
-    
     return None
 
-def should_skip_file(filename, text_context=""):
-    """Check if file should be skipped (deprecated annual reports)."""
-    combined = (filename + " " + text_context).lower()
-    
+def _skip_combined(combined, filename):
+    """Skip decision for lowercased filename + context."""
     # Skip if it matches deprecated patterns (but not "record layout" PDFs)
-    if "record layout" not in combined and "record_layout" not in combined:
-        for pattern in SKIP_PATTERNS:
-            if pattern in combined:
-                return True
-        
-        # Skip PDF annual reports specifically (but not layouts)
-        if "annual" in combined and "report" in combined and filename.lower().endswith(".pdf"):
+    if "record layout" in combined or "record_layout" in combined:
+        return False
+    for pattern in _SKIP_PATTERNS:
+        if pattern in combined:
             return True
     
-    return False
+    # Skip PDF annual reports specifically (but not layouts)
+    return "annual" in combined and "report" in combined and filename.lower().endswith(".pdf")
+
+def classify_link(filename, text_context=""):
+    """
+    Skip decision and program for a link, lowercasing filename plus context
+    once. Program keys may match in either. Returns (should_skip, program_or_None).
+    """
+    combined = (filename + " " + text_context).lower()
+    return _skip_combined(combined, filename), program_from_text(combined)
+
+def detect_program_from_filename(filename):
+    """Detect program from filename as fallback."""
+    return program_from_text(filename.lower())
+
+def should_skip_file(filename, text_context=""):
+    """Check if file should be skipped (deprecated annual reports)."""
+    return _skip_combined((filename + " " + text_context).lower(), filename)
 
-def parse_table_links(soup):
+def parse_table_links(soup, page_url: str = None):
     """Parse download links from table format (used in Latest Quarterly Updates)."""
+    page_url = page_url or BASE_URL
     table_links = []
     
     for table in soup.find_all("table"):
@@ -253,22 +343,15 @@ def parse_table_links(soup):
                     
                     filename = href.split("/")[-1]
                     
-                    if should_skip_file(filename, program_cell):
+                    # Program keys may appear in the cell or the filename
+                    skip, current_program = classify_link(filename, program_cell)
+                    if skip:
                         logger.debug(f"[TABLE] Skipping deprecated: {filename}")
                         continue
                     
-                    full_url = urljoin(BASE_URL, href)
+                    full_url = urljoin(page_url, href)
                     year = extract_year(filename)
                     
-                    current_program = None
-                    for key, val in PROGRAM_MAP.items():
-                        if key in program_cell.lower() or key in filename.lower():
-                            current_program = val
-                            break
-                    
-                    if not current_program:
-                        current_program = detect_program_from_filename(filename)
-                    
                     if not current_program:
                         current_program = "Uncategorized"
                     
@@ -281,77 +364,482 @@ def parse_table_links(soup):
     
     return table_links
 
-def download_file_atomic(url: str, filepath: str) -> tuple:
+_host_throttles: Dict[str, HostThrottle] = {}
+_host_throttles_lock = threading.Lock()
+_bandwidth: Optional[TokenBucket] = None
+
+def host_throttle(host: str) -> HostThrottle:
+    """Return the throttle (rate limit + adaptive connection cap) for a host."""
+    host = (host or "").lower()
+    with _host_throttles_lock:
+        throttle = _host_throttles.get(host)
+        if throttle is None:
+            throttle = HostThrottle(
+                REQUESTS_PER_SECOND,
+                REQUEST_BURST,
+                initial_concurrency=INITIAL_CONNECTIONS_PER_HOST,
+                max_concurrency=MAX_CONNECTIONS_PER_HOST,
+                latency_target=LATENCY_TARGET,
+            )
+            _host_throttles[host] = throttle
+    return throttle
+
+def host_slot(url: str):
+    """Context manager holding one of the URL's host connection slots."""
+    return host_throttle(urlsplit(url).hostname).slot()
+
+def throttle_bandwidth(nbytes: int):
+    """Pace downloads to BANDWIDTH_LIMIT bytes/second, if set."""
+    global _bandwidth
+    if not BANDWIDTH_LIMIT:
+        return
+    with _host_throttles_lock:
+        if _bandwidth is None:
+            _bandwidth = TokenBucket(BANDWIDTH_LIMIT)
+    _bandwidth.acquire(nbytes)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Return the shared HTTP session, creating it on first use.
+    Connections are kept alive and pooled across requests (and worker
+    threads), every request is paced by its host's throttle, and idempotent
+    requests are retried with exponential backoff on connection errors and
+    429/5xx, honoring Retry-After.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            # Deferred: requests/urllib3 are most of scrape.py's import time
+            from http_session import build_session
+            _session = build_session(
+                host_throttle,
+                pool_size=HTTP_POOL_SIZE,
+                retries=HTTP_RETRIES,
+                backoff_factor=HTTP_BACKOFF_FACTOR,
+                retry_statuses=HTTP_RETRY_STATUSES,
+            )
+    return _session
+
+def conditional_headers(cached: Optional[Dict]) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from a manifest entry."""
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+def is_not_modified(response: requests.Response, cached: Optional[Dict]) -> bool:
     """
-    Download file atomically to temporary location, then move to final location.
-    Returns (content, headers_dict) on success.
+    True if the response says the cached copy is current: either a 304, or a
+    200 from a server that ignores conditional headers but returns the same
+    ETag/Last-Modified we already have.
     """
-    temp_fd, temp_path = tempfile.mkstemp(
-        dir=os.path.dirname(filepath),
-        prefix=".download_",
-        suffix=os.path.splitext(filepath)[1]
+    if response.status_code == 304:
+        return True
+    if not cached or response.status_code != 200:
+        return False
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag and cached.get("etag") == etag:
+        return True
+    if last_modified and cached.get("last_modified") == last_modified:
+        return True
+    return False
+
+def resumable_errors() -> tuple:
+    """Errors after which a partial download is worth resuming."""
+    import requests
+    return (
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.exceptions.ChunkedEncodingError,
     )
+
+def partial_paths(filepath: str) -> Tuple[str, str]:
+    """Return (partial_file, sidecar) paths used while downloading filepath."""
+    directory, name = os.path.split(filepath)
+    part_path = os.path.join(directory, f".{name}.part")
+    return part_path, f"{part_path}.json"
+
+def discard_partial(filepath: str):
+    """Remove any partial download and its sidecar."""
+    for path in partial_paths(filepath):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+def range_validator(etag: Optional[str], last_modified: Optional[str]) -> Optional[str]:
+    """Pick the validator to send as If-Range (strong ETag, else Last-Modified)."""
+    if etag and not etag.startswith("W/"):
+        return etag
+    return last_modified
+
+def write_partial_sidecar(filepath: str, url: str, headers, received: int, hasher):
+    """Atomically record progress of a partial download."""
+    _, sidecar_path = partial_paths(filepath)
+    sidecar = {
+        "url": url,
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "bytes_received": received,
+        "sha256": hasher.copy().hexdigest(),
+    }
+    temp_path = f"{sidecar_path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(sidecar, f)
+    os.replace(temp_path, sidecar_path)
+
+def load_partial(url: str, filepath: str) -> Optional[Tuple[int, "hashlib._Hash", str]]:
+    """
+    Validate a partial download left by an earlier attempt.
+    Returns (bytes_received, hasher_over_those_bytes, if_range_validator),
+    or None (discarding the partial) if it can't be trusted.
+    """
+    part_path, sidecar_path = partial_paths(filepath)
+    if not os.path.exists(sidecar_path):
+        return None
     
     try:
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
+        with open(sidecar_path, "r") as f:
+            sidecar = json.load(f)
+        received = int(sidecar.get("bytes_received", 0))
+        validator = range_validator(sidecar.get("etag"), sidecar.get("last_modified"))
         
-        # Write to temp file
-        with os.fdopen(temp_fd, 'wb') as f:
-            f.write(r.content)
+        if (sidecar.get("url") != url or not validator or received <= 0
+                or os.path.getsize(part_path) < received):
+            discard_partial(filepath)
+            return None
         
-        # Atomic move to final location
-        shutil.move(temp_path, filepath)
-        
-        return r.content, dict(r.headers)
-        
-    except Exception as e:
-        # Clean up temp file on error
+        # Re-hash the bytes we already have; anything written after the last
+        # checkpoint is dropped
+        hasher = hashlib.sha256()
+        with open(part_path, "r+b") as f:
+            remaining = received
+            while remaining:
+                chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+            f.truncate(received)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Discarding unreadable partial for {filepath}: {e}")
+        discard_partial(filepath)
+        return None
+    
+    if hasher.hexdigest() != sidecar.get("sha256"):
+        logger.warning(f"Partial download corrupted, restarting: {filepath}")
+        discard_partial(filepath)
+        return None
+    
+    return received, hasher, validator
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file on disk, read in chunks."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def blob_path(digest: str) -> str:
+    """Location of the content-addressed blob for a SHA-256 digest."""
+    return os.path.join(blob_dir, digest[:2], digest)
+
+def reflink(source: str, target: str):
+    """
+    Create target as a copy-on-write clone of source (FICLONE; Btrfs, XFS,
+    overlayfs on those, ...). Raises OSError where that isn't supported.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError("reflinks are not supported on this platform")
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+def share_file(source: str, target: str) -> bool:
+    """
+    Atomically place source's content at target without a second copy on
+    disk: a hardlink, else a reflink. Returns False (leaving target as it
+    was) if neither is supported, e.g. across filesystems.
+    """
+    temp_path = os.path.join(
+        os.path.dirname(target),
+        f".link_{os.path.basename(target)}.{threading.get_ident()}"
+    )
+    try:
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            reflink(source, temp_path)
+        os.replace(temp_path, target)
+    except OSError as e:
+        logger.debug(f"Cannot share {source} with {target}: {e}")
         try:
             os.unlink(temp_path)
-        except:
+        except OSError:
             pass
-        raise e
+        return False
+    return True
 
-# ---------------------------------------------------------------------
-# Main Scraping Logic
-# ---------------------------------------------------------------------
+def place_download(part_path: str, digest: str, filepath: str) -> Optional[str]:
+    """
+    Move a fully downloaded file to filepath, sharing its storage with the
+    content-addressed blob for its SHA-256. If that content is already
+    stored, the new copy is dropped. Where the file can't share storage
+    with the blob store, it is kept in the tree only (never copied).
+    Returns the blob path, or None if the file isn't in the blob store.
+    """
+    path = blob_path(digest)
+    if os.path.exists(path):
+        if share_file(path, filepath):
+            os.unlink(part_path)
+            logger.debug(f"Content already stored, deduplicated: {digest[:12]}")
+            return path
+        os.replace(part_path, filepath)
+        return None
+    
+    os.replace(part_path, filepath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path if share_file(filepath, path) else None
 
-def main():
-    logger.info("="*60)
-    logger.info(f"Starting scrape at {datetime.now()}")
-    logger.info("="*60)
+def fetch_to_partial(url: str, filepath: str, cached: Optional[Dict] = None) -> Optional[tuple]:
+    """
+    One download attempt into the partial file, resuming it if possible.
+    On a resumable error the partial and its sidecar are kept for the next
+    attempt. Returns None if the cached copy is unchanged, otherwise
+    (sha256_hex, size_bytes, headers_dict, blob_path_or_None) once the
+    file is in place.
+    """
+    import requests
     
-    # Note about hash-based deduplication
-    logger.info("Note: Deduplication uses ETag/Last-Modified headers")
-    logger.info("Future improvement: Add hash-based dedup for identical files with different URLs")
-    logger.info("")
+    part_path, sidecar_path = partial_paths(filepath)
+    headers = conditional_headers(cached)
     
-    logger.info(f"Fetching: {BASE_URL}")
+    resume = load_partial(url, filepath)
+    if resume:
+        offset, hasher, validator = resume
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = validator
+    else:
+        offset, hasher = 0, hashlib.sha256()
+    
+    session = get_session()
+    with session.get(url, headers=headers, timeout=HTTP_TIMEOUT, stream=True) as r:
+        if is_not_modified(r, cached):
+            discard_partial(filepath)
+            return None
+        
+        if offset and 400 <= r.status_code < 500:
+            # The range itself was refused (416: the partial already holds
+            # the whole file). Retrying it would fail forever; start over
+            logger.warning(
+                f"Server refused to resume {os.path.basename(filepath)} at {offset} bytes "
+                f"(HTTP {r.status_code}); restarting download"
+            )
+            discard_partial(filepath)
+            r.close()
+            return fetch_to_partial(url, filepath, cached)
+        
+        total = None
+        if offset and r.status_code == 206:
+            # Content-Range: bytes <start>-<end>/<total>
+            match = re.match(r"bytes (\d+)-\d+/(\d+|\*)", r.headers.get("Content-Range", ""))
+            if not match or int(match.group(1)) != offset:
+                discard_partial(filepath)
+                raise IOError(f"Unexpected Content-Range: {r.headers.get('Content-Range')}")
+            if match.group(2) != "*":
+                total = int(match.group(2))
+            mode = "ab"
+            logger.info(f"Resuming {os.path.basename(filepath)} at {offset} bytes")
+        else:
+            r.raise_for_status()
+            # Fresh download: server ignored the range or the file changed
+            offset, hasher, mode = 0, hashlib.sha256(), "wb"
+            if r.headers.get("Content-Length", "").isdigit() and not r.headers.get("Content-Encoding"):
+                total = int(r.headers["Content-Length"])
+        
+        resumable = range_validator(r.headers.get("ETag"), r.headers.get("Last-Modified")) is not None
+        received = offset
+        checkpoint = offset
+        transfer_start = time.monotonic()
+        
+        try:
+            with open(part_path, mode) as f:
+                for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    throttle_bandwidth(len(chunk))
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    received += len(chunk)
+                    
+                    if resumable and received - checkpoint >= PARTIAL_CHECKPOINT_BYTES:
+                        f.flush()
+                        write_partial_sidecar(filepath, url, r.headers, received, hasher)
+                        checkpoint = received
+            
+            if total is not None and received != total:
+                raise requests.exceptions.ChunkedEncodingError(
+                    f"Incomplete download: {received} of {total} bytes"
+                )
+        except Exception:
+            if resumable and received > 0:
+                write_partial_sidecar(filepath, url, r.headers, received, hasher)
+            else:
+                discard_partial(filepath)
+            raise
+        finally:
+            telemetry.add("transfer_seconds", time.monotonic() - transfer_start)
+            telemetry.add("bytes", received - offset)
+        
+        response_headers = dict(r.headers)
+    
+    digest = hasher.hexdigest()
+    
+    # A resumed file was assembled across requests; verify it end to end
+    if resume and file_sha256(part_path) != digest:
+        discard_partial(filepath)
+        raise IOError(f"SHA-256 mismatch after resuming {filepath}")
+    
+    stored_blob = place_download(part_path, digest, filepath)
     try:
-        response = requests.get(BASE_URL, timeout=30)
-        response.raise_for_status()
-    except Exception as e:
-        logger.error(f"Failed to fetch main page: {e}")
-        return 1
+        os.unlink(sidecar_path)
+    except FileNotFoundError:
+        pass
+    
+    return digest, received, response_headers, stored_blob
+
+def download_file_atomic(url: str, filepath: str, cached: Optional[Dict] = None) -> Optional[tuple]:
+    """
+    Stream file to a partial file next to filepath, then move it into place.
+    The body is written in chunks and hashed as it arrives, so memory use
+    does not depend on file size. Interrupted downloads are resumed with
+    HTTP Range requests, within this call and across runs.
     
-    soup = BeautifulSoup(response.text, "html.parser")
+    If a cached manifest entry is given, the GET is conditional on its
+    ETag/Last-Modified and None is returned when the server reports the
+    file unchanged (nothing is written).
+    Returns (sha256_hex, size_bytes, headers_dict, blob_path_or_None) on
+    success; blob_path is None where the file can't share storage with
+    the blob store.
+    """
+    _, sidecar_path = partial_paths(filepath)
     
-    manifest = load_manifest()
-    download_links = []
+    for attempt in range(1, DOWNLOAD_RESUME_ATTEMPTS + 1):
+        try:
+            return fetch_to_partial(url, filepath, cached)
+        except resumable_errors() as e:
+            if attempt == DOWNLOAD_RESUME_ATTEMPTS or not os.path.exists(sidecar_path):
+                raise
+            logger.warning(
+                f"Download of {os.path.basename(filepath)} interrupted ({e}); "
+                f"resuming (attempt {attempt + 1}/{DOWNLOAD_RESUME_ATTEMPTS})"
+            )
+            telemetry.add("resume_attempts", 1)
+
+def process_download(
+    item: Dict,
+    filepath: str,
+    cached: Optional[Dict],
+    metrics: Optional[telemetry.RunMetrics] = None,
+) -> Optional[Dict]:
+    """
+    Revalidate and download a single file with one conditional GET.
+    Safe to run in a worker thread.
+    Returns the new manifest entry, or None if the cached copy is unchanged.
+    Does not touch the manifest itself; the caller records the entry.
+    Per-file timings and the revalidation result are added to metrics.
+    """
+    import requests
+    
+    url = item["url"]
+    filename = item["filename"]
+    safe_program = clean_program_name(item["program"])
+    
+    # Only revalidate when we still have the file; otherwise fetch it fresh
+    if cached is not None and not os.path.exists(filepath):
+        cached = None
+    
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    
+    with telemetry.track(url, metrics, program=safe_program, filename=filename, year=item["year"]) as record:
+        with host_slot(url):
+            try:
+                result = download_file_atomic(url, filepath, cached)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if cached is None:
+                    raise
+                # Keep the copy we have if the server can't be reached
+                logger.warning(f"Revalidation failed for {url}: {e}")
+                logger.debug(f"Skipping (file exists, request failed): {filename}")
+                record["result"] = "kept_after_error"
+                record["error"] = str(e)
+                return None
+        
+        if result is None:
+            logger.debug(f"Skipping (not modified): {filename}")
+            record["result"] = "not_modified"
+            record["size"] = cached.get("size")
+            return None
+        
+        digest, size, headers, stored_blob = result
+        record["result"] = "new" if cached is None else "changed"
+        record["size"] = size
+    
+    logger.info(f"Downloaded ({safe_program}/{item['year']}): {filename}")
+    
+    return {
+        "program": safe_program,
+        "filename": filename,
+        "year": item["year"],
+        "saved_path": filepath,
+        "sha256": digest,
+        "size": size,
+        "blob_path": stored_blob,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+    }
+
+def discover_links(soup, page_url: str = None) -> list:
+    """
+    Extract downloadable file records ({program, url, filename, year}) from
+    a portal page: table links first, then every other anchor on the page.
+    """
+    page_url = page_url or BASE_URL
     
     # Parse table-based links
     logger.info("Parsing table-based links...")
-    table_links = parse_table_links(soup)
-    logger.info(f"Found {len(table_links)} files from tables")
-    download_links.extend(table_links)
+    download_links = parse_table_links(soup, page_url)
+    logger.info(f"Found {len(download_links)} files from tables")
     
-    # Parse all links on page
+    # URLs already discovered, so each anchor is a set lookup rather than a
+    # scan of everything found so far
+    seen_urls = {item["url"] for item in download_links}
+    
+    # Parse all links on page in one document-order walk. The program of the
+    # nearest preceding heading is tracked as we go, instead of walking
+    # backwards from every anchor.
     logger.info("Scanning all links on page...")
-    all_links = soup.find_all("a", href=True)
+    section_program = None
+    context_programs = {}
     
-    for link in all_links:
-        href = link["href"]
+    for element in soup.find_all(["a", *SECTION_TAGS]):
+        if element.name != "a":
+            text = element.get_text(strip=True).lower()
+            if "annual" not in text:
+                section_program = program_from_text(text) or section_program
+            continue
+        
+        href = element.get("href")
+        if href is None:
+            continue
         href_lower = href.lower()
         
         if not any(href_lower.endswith(ext) for ext in VALID_EXTS):
@@ -359,126 +847,664 @@ def main():
         
         filename = href.split("/")[-1]
         
-        if should_skip_file(filename):
+        skip, program = classify_link(filename)
+        if skip:
             continue
         
-        program = detect_program_from_filename(filename)
+        full_url = urljoin(page_url, href)
+        normalized_url = normalize_url(full_url)
+        
+        if normalized_url in seen_urls:
+            continue
         
         if not program:
-            parent = link.find_parent(["td", "p", "li", "div"])
-            if parent:
-                context = parent.get_text(strip=True)
-                for key, val in PROGRAM_MAP.items():
-                    if key in context.lower():
-                        program = val
-                        break
+            # Many links share a container; classify each container once
+            parent = element.find_parent(["td", "p", "li", "div"])
+            if parent is not None:
+                key = id(parent)
+                if key not in context_programs:
+                    context = parent.get_text(strip=True)
+                    context_programs[key] = program_from_text(context.lower())
+                program = context_programs[key]
         
         if not program:
-            for prev in link.find_all_previous(["h2", "h3", "h4", "strong", "b"]):
-                text = prev.get_text(strip=True).lower()
-                for key, val in PROGRAM_MAP.items():
-                    if key in text and "annual" not in text:
-                        program = val
-                        break
-                if program:
-                    break
+            program = section_program
         
         if not program:
             program = "Uncategorized"
         
-        full_url = urljoin(BASE_URL, href)
-        normalized_url = normalize_url(full_url)
-        year = extract_year(filename)
-        
-        if any(item["url"] == normalized_url for item in download_links):
-            continue
-        
+        seen_urls.add(normalized_url)
         download_links.append({
             "program": program,
             "url": normalized_url,
             "filename": filename,
-            "year": year
+            "year": extract_year(filename)
         })
     
-    logger.info(f"Found {len(download_links)} total downloadable files")
-    
-    # Download files
-    downloaded_count = 0
-    skipped_count = 0
-    failed_count = 0
+    return download_links
+
+def crawl_scope() -> Tuple[set, str]:
+    """Allowed hosts and path prefix for crawl mode."""
+    base = urlsplit(BASE_URL)
+    domains = {d.lower() for d in CRAWL_ALLOWED_DOMAINS} or {base.netloc.lower()}
+    prefix = CRAWL_PATH_PREFIX
+    if prefix is None:
+        prefix = base.path.rsplit("/", 1)[0] + "/"
+    return domains, prefix
+
+def extract_page_links(soup, page_url: str) -> list:
+    """Same-site HTML page URLs linked from a page, within the crawl scope."""
+    domains, prefix = crawl_scope()
+    pages = []
+    seen = set()
     
-    for item in download_links:
-        program = item["program"]
-        url = item["url"]
-        filename = item["filename"]
-        year = item["year"]
-        
-        safe_program = clean_program_name(program)
-        
-        program_dir = os.path.join(SAVE_DIR, safe_program)
-        year_dir = os.path.join(program_dir, year)
-        os.makedirs(year_dir, exist_ok=True)
-        filepath = os.path.join(year_dir, filename)
+    for link in soup.find_all("a", href=True):
+        href = link["href"].strip()
+        if not href or href.startswith(("#", "mailto:", "tel:", "javascript:")):
+            continue
         
-        # Check if we should skip this file
-        should_skip = False
+        parts = urlsplit(urljoin(page_url, href))
+        if parts.scheme not in ("http", "https") or parts.netloc.lower() not in domains:
+            continue
+        if not parts.path.startswith(prefix) or parts.path.lower().endswith(VALID_EXTS):
+            continue
         
-        # Skip if URL in manifest and unchanged
-        if url in manifest:
-            try:
-                head = requests.head(url, timeout=10)
-                etag = head.headers.get("ETag")
-                last_modified = head.headers.get("Last-Modified")
+        url = normalize_url(urlunsplit(parts._replace(fragment="")))
+        if url not in seen:
+            seen.add(url)
+            pages.append(url)
+    
+    return pages
+
+_html_parser: Optional[str] = None
+
+def html_parser() -> str:
+    """HTML parser backend for BeautifulSoup: lxml is much faster when installed."""
+    global _html_parser
+    if _html_parser is None:
+        try:
+            import lxml  # noqa: F401
+            _html_parser = "lxml"
+        except ImportError:
+            _html_parser = "html.parser"
+    return _html_parser
+
+def fetch_page(url: str, cached: Optional[Dict]) -> Dict:
+    """
+    Fetch one HTML page, conditionally on its cached validators, and extract
+    its file links and same-site sub-pages. Safe to run in a worker thread.
+    Returns the page record to cache: {etag, last_modified, links, pages,
+    checked_at}. Raises if the page can't be fetched.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    
+    # Conditional only if we still have what was extracted last time
+    headers = {}
+    if cached and cached.get("links") is not None and cached.get("pages") is not None:
+        headers = conditional_headers(cached)
+    
+    with host_slot(url):
+        response = get_session().get(url, headers=headers, timeout=HTTP_TIMEOUT)
+    
+    if response.status_code == 304:
+        logger.info(f"Page not modified - using cached links: {url}")
+        return {**cached, "checked_at": now}
+    response.raise_for_status()
+    
+    links, pages = [], []
+    if "html" in response.headers.get("Content-Type", "text/html"):
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(response.text, html_parser())
+        links = discover_links(soup, url)
+        pages = extract_page_links(soup, url)
+    
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "links": links,
+        "pages": pages,
+        "checked_at": now,
+    }
+
+def crawl(manifest: ManifestStore, max_depth: int = 0, persist: bool = True) -> Tuple[list, Dict]:
+    """
+    Breadth-first crawl from BASE_URL, up to max_depth hops and
+    CRAWL_MAX_PAGES pages, fetching each level concurrently. Every page is
+    cached in the manifest store with its validators, unless persist is
+    False (cached pages are still used for conditional requests).
+    Returns (download_links, base_page_record); file links are deduplicated
+    by URL, earlier pages first. Raises if BASE_URL itself can't be fetched.
+    """
+    download_links = []
+    seen_urls = set()
+    seen_pages = {BASE_URL}
+    frontier = [BASE_URL]
+    base_record = None
+    
+    with ThreadPoolExecutor(max_workers=max(1, CRAWL_WORKERS)) as pool:
+        for depth in range(max_depth + 1):
+            if not frontier:
+                break
+            if depth:
+                logger.info(f"Crawling {len(frontier)} pages at depth {depth}...")
+            
+            futures = [
+                pool.submit(fetch_page, url, manifest.get_page(url)) for url in frontier
+            ]
+            next_frontier = []
+            
+            # Collect in frontier order so results don't depend on timing
+            for url, future in zip(frontier, futures):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    if url == BASE_URL:
+                        raise
+                    logger.warning(f"Failed to fetch page {url}: {e}")
+                    continue
                 
-                cached = manifest[url]
+                # Keep run-level fields (fingerprint) stored on the page
+                if persist:
+                    previous = manifest.get_page(url) or {}
+                    manifest.put_page(url, {**previous, **record})
+                if url == BASE_URL:
+                    base_record = record
                 
-                if etag and cached.get("etag") == etag:
-                    logger.debug(f"Skipping (ETag match): {filename}")
-                    should_skip = True
-                elif last_modified and cached.get("last_modified") == last_modified:
-                    logger.debug(f"Skipping (Last-Modified match): {filename}")
-                    should_skip = True
-            except Exception as e:
-                logger.warning(f"HEAD request failed for {url}: {e}")
-                # If HEAD fails, check if file exists on disk
-                if os.path.exists(filepath):
-                    logger.debug(f"Skipping (file exists, HEAD failed): {filename}")
-                    should_skip = True
+                for item in record["links"]:
+                    if item["url"] not in seen_urls:
+                        seen_urls.add(item["url"])
+                        download_links.append(item)
+                
+                if depth < max_depth:
+                    for page in record["pages"]:
+                        if page not in seen_pages and len(seen_pages) < CRAWL_MAX_PAGES:
+                            seen_pages.add(page)
+                            next_frontier.append(page)
+            
+            frontier = next_frontier
+    
+    if max_depth:
+        logger.info(f"Crawled {len(seen_pages)} pages")
+    return download_links, base_record
+
+def plan_downloads(download_links: list, manifest: ManifestStore) -> Tuple[list, int]:
+    """
+    Decide which discovered files need a (conditional) download.
+    Returns ([(item, filepath, cached_entry_or_None), ...], skipped_count).
+    
+    A file is skipped without any request if its URL is new but its path is
+    already tracked under another URL, or claimed earlier in this run (so
+    two URLs that map to the same file are never written concurrently).
+    """
+    # Every path tracked by the manifest or claimed by this run, loaded once
+    known_paths = manifest.saved_paths()
+    
+    jobs = []
+    skipped_count = 0
+    
+    for item in download_links:
+        safe_program = clean_program_name(item["program"])
+        filepath = os.path.join(SAVE_DIR, safe_program, item["year"], item["filename"])
         
         # Skip if file path already exists in manifest (different URL, same file)
-        elif any(entry.get("saved_path") == filepath for entry in manifest.values()):
+        cached = manifest.get(item["url"])
+        if cached is None and filepath in known_paths:
             logger.debug(f"Skipping (path exists): {filepath}")
-            should_skip = True
-        
-        if should_skip:
             skipped_count += 1
             continue
         
-        # Download
-        logger.info(f"Downloading ({safe_program}/{year}): {filename}")
-        try:
-            content, headers = download_file_atomic(url, filepath)
-            digest = hashlib.sha256(content).hexdigest()
+        known_paths.add(filepath)
+        jobs.append((item, filepath, cached))
+    
+    return jobs, skipped_count
+
+def links_fingerprint(download_links: list) -> str:
+    """SHA-256 of the extracted link records, independent of page order."""
+    records = sorted(json.dumps(item, sort_keys=True) for item in download_links)
+    return hashlib.sha256("\n".join(records).encode("utf-8")).hexdigest()
+
+def full_revalidation_due(cached_page: Optional[Dict]) -> bool:
+    """True if the last full revalidation is older than FULL_REVALIDATION_DAYS."""
+    last = (cached_page or {}).get("full_revalidation_at")
+    if not last:
+        return True
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(last)
+    return age.days >= FULL_REVALIDATION_DAYS
+
+def sample_revalidation(jobs: list) -> Tuple[list, list]:
+    """
+    Keep every never-downloaded file plus a random sample of files already
+    in the manifest. Returns (jobs_to_run, jobs_left_out).
+    """
+    new_jobs = [job for job in jobs if job[2] is None]
+    known_jobs = [job for job in jobs if job[2] is not None]
+    sample = random.sample(known_jobs, min(REVALIDATION_SAMPLE_SIZE, len(known_jobs)))
+    logger.info(
+        f"Index unchanged - revalidating {len(sample)} of {len(known_jobs)} known files"
+    )
+    return new_jobs + sample, [job for job in known_jobs if job not in sample]
+
+def sample_changed(manifest: ManifestStore, jobs: list) -> bool:
+    """True if any already-known file in jobs was re-downloaded with new content."""
+    for item, _, cached_entry in jobs:
+        if cached_entry is None:
+            continue
+        entry = manifest.get(item["url"])
+        if entry and entry.get("sha256") != cached_entry.get("sha256"):
+            return True
+    return False
+
+# ---------------------------------------------------------------------
+# Sync Plans
+# ---------------------------------------------------------------------
+
+PLAN_VERSION = 1
+PLAN_FETCH_STATUSES = ("new", "changed", "error")
+
+def probe_file(item: Dict, filepath: str, cached: Optional[Dict]) -> Dict:
+    """
+    Revalidate one file without downloading it: a conditional HEAD (or a
+    streamed GET whose body is never read, for servers that reject HEAD).
+    Safe to run in a worker thread.
+    Returns the file's plan record with status new/changed/unchanged/error
+    and the server's Content-Length, if any.
+    """
+    import requests
+    
+    url = item["url"]
+    if cached is not None and not os.path.exists(filepath):
+        cached = None
+    
+    record = {
+        "url": url,
+        "program": item["program"],
+        "filename": item["filename"],
+        "year": item["year"],
+        "saved_path": filepath,
+        "status": "new" if cached is None else "changed",
+        "content_length": None,
+        "etag": None,
+        "last_modified": None,
+    }
+    
+    session = get_session()
+    headers = conditional_headers(cached)
+    try:
+        with host_slot(url):
+            response = session.head(url, headers=headers, timeout=HTTP_TIMEOUT, allow_redirects=True)
+            if response.status_code in (405, 501):
+                response = session.get(url, headers=headers, timeout=HTTP_TIMEOUT, stream=True)
+                response.close()
+        not_modified = is_not_modified(response, cached)
+        if not not_modified:
+            response.raise_for_status()
+    except requests.RequestException as e:
+        logger.warning(f"Revalidation failed for {url}: {e}")
+        record["status"] = "error"
+        record["error"] = str(e)
+        return record
+    
+    if not_modified:
+        record["status"] = "unchanged"
+        record["content_length"] = cached.get("size")
+    elif response.headers.get("Content-Length"):
+        record["content_length"] = int(response.headers["Content-Length"])
+    record["etag"] = response.headers.get("ETag") or (cached or {}).get("etag")
+    record["last_modified"] = response.headers.get("Last-Modified") or (cached or {}).get("last_modified")
+    return record
+
+def build_plan(jobs: list, skipped: int, workers: int) -> Dict:
+    """
+    Probe every planned job concurrently and assemble the sync plan:
+    per-file records (in discovery order) plus counts and byte totals.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        files = list(pool.map(lambda job: probe_file(*job), jobs))
+    
+    summary = {status: 0 for status in ("new", "changed", "unchanged", "error")}
+    fetch_bytes = 0
+    unknown_size = 0
+    for record in files:
+        summary[record["status"]] += 1
+        if record["status"] in PLAN_FETCH_STATUSES:
+            if record["content_length"] is None:
+                unknown_size += 1
+            else:
+                fetch_bytes += record["content_length"]
+    summary.update({
+        "skipped_path_exists": skipped,
+        "fetch_files": sum(summary[s] for s in PLAN_FETCH_STATUSES),
+        "fetch_bytes": fetch_bytes,
+        "fetch_unknown_size": unknown_size,
+    })
+    
+    return {
+        "version": PLAN_VERSION,
+        "base_url": BASE_URL,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "summary": summary,
+        "files": files,
+    }
+
+def write_plan(plan: Dict, path: str):
+    """Write a plan as JSON to path ("-" for stdout), atomically for files."""
+    if path == "-":
+        json.dump(plan, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(plan, f, indent=2)
+    os.replace(temp_path, path)
+
+def load_plan(path: str) -> Dict:
+    """Read a plan written by write_plan(); rejects unknown versions."""
+    with open(path, "r") as f:
+        plan = json.load(f)
+    if plan.get("version") != PLAN_VERSION:
+        raise ValueError(f"Unsupported plan version: {plan.get('version')}")
+    return plan
+
+def jobs_from_plan(plan: Dict, manifest: ManifestStore) -> list:
+    """
+    Turn a plan's new/changed/error records back into download jobs.
+    The cached entry is re-read from the manifest, so anything fetched since
+    the plan was made is revalidated rather than downloaded again.
+    """
+    jobs = []
+    for record in plan["files"]:
+        if record["status"] not in PLAN_FETCH_STATUSES:
+            continue
+        item = {key: record[key] for key in ("program", "url", "filename", "year")}
+        jobs.append((item, record["saved_path"], manifest.get(record["url"])))
+    return jobs
+
+# ---------------------------------------------------------------------
+# Conversion Pipeline
+# ---------------------------------------------------------------------
+
+def needs_conversion(entry: Dict) -> bool:
+    """True if the entry is a convertible workbook or archive whose Parquet is missing or stale."""
+    if entry.get("program") not in CONVERT_PROGRAMS:
+        return False
+    if not entry.get("filename", "").lower().endswith(CONVERT_EXTS):
+        return False
+    # Don't retry a file that already failed to convert until its content changes
+    if entry.get("parquet_failed_sha256") == entry.get("sha256"):
+        return False
+    if entry.get("parquet_source_sha256") != entry.get("sha256"):
+        return True
+    return not os.path.exists(entry.get("parquet_path") or "")
+
+def conversion_executor(workers: int):
+    """
+    Pool for Parquet conversion. Conversion is CPU-bound, so use processes
+    where fork is available; every worker is forked immediately, while the
+    main thread is still the only thread. Falls back to threads elsewhere.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    if "fork" in multiprocessing.get_all_start_methods():
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+        pool.submit(os.getpid).result()
+        return pool
+    return ThreadPoolExecutor(max_workers=workers)
+
+class ConversionPipeline:
+    """
+    Converts downloaded workbooks to Parquet while downloads continue.
+    submit() and collect() must be called from the main thread, which is
+    also the only writer of conversion results to the manifest.
+    """
+    
+    def __init__(self, manifest: ManifestStore, workers: int = CONVERT_WORKERS):
+        import convert_to_parquet_perm
+        self.converter = convert_to_parquet_perm
+        self.manifest = manifest
+        self.pool = conversion_executor(max(1, workers))
+        self.pending = {}
+        self.queued_urls = set()
+        self.converted = 0
+        self.failed = 0
+    
+    def submit(self, url: str, entry: Dict):
+        """Queue an entry for conversion; no-op if its Parquet is already current."""
+        if url in self.queued_urls or not needs_conversion(entry):
+            return
+        source = entry["saved_path"]
+        if source.lower().endswith(".zip"):
+            future = self.pool.submit(self.converter.convert_archive, source)
+        else:
+            future = self.pool.submit(self.converter.convert_file, source)
+        self.pending[future] = (url, entry["sha256"])
+        self.queued_urls.add(url)
+        logger.debug(f"Queued for conversion: {entry['filename']}")
+    
+    def queue_backlog(self):
+        """Queue tracked files converted before this run that are now missing or stale."""
+        for program in CONVERT_PROGRAMS:
+            for url, entry in self.manifest.find_by_program_year(program).items():
+                if os.path.exists(entry.get("saved_path") or ""):
+                    self.submit(url, entry)
+    
+    def collect(self, block: bool = False):
+        """Record finished conversions in the manifest (waits for one if block)."""
+        if not self.pending:
+            return
+        done, _ = wait(self.pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            url, source_sha256 = self.pending.pop(future)
+            error = None
+            try:
+                parquet_path, result = future.result()
+                update = {
+                    "parquet_path": parquet_path,
+                    "parquet_source_sha256": source_sha256,
+                    "converted_at": datetime.now(timezone.utc).isoformat(),
+                }
+                if isinstance(result, list):
+                    # Archive: per-member hashes and provenance; parquet_path is a directory
+                    update["members"] = result
+                    update["parquet_rows"] = sum(m["rows"] or 0 for m in result)
+                    for member in result:
+                        if member["error"]:
+                            logger.warning(f"Could not convert {member['name']} in {url}: {member['error']}")
+                else:
+                    update["parquet_rows"] = result
+            except Exception as e:
+                logger.error(f"✗ Failed to convert {url}: {e}")
+                self.failed += 1
+                error = str(e)
+                update = {"parquet_failed_sha256": source_sha256, "parquet_error": error}
+            
+            # Skip the update if the file was replaced after it was queued
+            entry = self.manifest.get(url)
+            if entry is None or entry.get("sha256") != source_sha256:
+                continue
+            if error is None:
+                entry.pop("parquet_failed_sha256", None)
+                entry.pop("parquet_error", None)
+            try:
+                self.manifest.upsert(url, {**entry, **update})
+            except Exception as e:
+                logger.error(f"✗ Failed to record conversion of {url} in manifest: {e}")
+                self.failed += error is None
+                continue
+            if error is None:
+                logger.info(f"✓ Converted to: {update['parquet_path']} ({update['parquet_rows']} rows)")
+                self.converted += 1
+    
+    def finish(self) -> Tuple[int, int]:
+        """Queue the backlog, wait for every conversion and shut the pool down."""
+        self.queue_backlog()
+        if self.pending:
+            logger.info(f"Waiting for {len(self.pending)} conversions...")
+        while self.pending:
+            self.collect(block=True)
+        self.pool.shutdown()
+        return self.converted, self.failed
+
+# ---------------------------------------------------------------------
+# Main Scraping Logic
+# ---------------------------------------------------------------------
+
+def run_downloads(
+    manifest: ManifestStore,
+    jobs: list,
+    workers: int,
+    metrics: Optional[telemetry.RunMetrics] = None,
+    pipeline: Optional[ConversionPipeline] = None,
+) -> Tuple[int, int, int]:
+    """
+    Download planned jobs in a worker pool, recording each new entry in the
+    manifest as it completes (and handing it to the conversion pipeline,
+    if any). Returns (downloaded, not_modified, failed).
+    """
+    downloaded_count = 0
+    skipped_count = 0
+    failed_count = 0
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {}
+        for item, filepath, cached in jobs:
+            future = pool.submit(process_download, item, filepath, cached, metrics)
+            futures[future] = item
+        
+        # Workers only read their own snapshot of the cached entry; the manifest
+        # is written here on the main thread, one transaction per file
+        for future in as_completed(futures):
+            url = futures[future]["url"]
+            try:
+                entry = future.result()
+            except Exception as e:
+                logger.error(f"✗ Failed to download {url}: {e}")
+                failed_count += 1
+                continue
             
-            manifest[url] = {
-                "program": safe_program,
-                "filename": filename,
-                "year": year,
-                "saved_path": filepath,
-                "sha256": digest,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "etag": headers.get("ETag"),
-                "last_modified": headers.get("Last-Modified"),
-            }
+            if entry is None:
+                skipped_count += 1
+                continue
             
-            # Save manifest after each successful download
-            save_manifest(manifest)
-            logger.info(f"✓ Saved to: {filepath}")
+            # Record each successful download durably as it completes
+            try:
+                manifest.upsert(url, entry)
+            except Exception as e:
+                logger.error(f"✗ Failed to record {url} in manifest: {e}")
+                failed_count += 1
+                continue
+            logger.info(f"✓ Saved to: {entry['saved_path']}")
             downloaded_count += 1
             
-        except Exception as e:
-            logger.error(f"✗ Failed to download {url}: {e}")
-            failed_count += 1
+            if pipeline is not None:
+                pipeline.submit(url, entry)
+                pipeline.collect()
+    
+    return downloaded_count, skipped_count, failed_count
+
+def write_run_metrics(metrics: telemetry.RunMetrics, **counts):
+    """
+    Write the run's per-file metrics to METRICS_DIR (JSON) and the
+    Prometheus textfile. A failure here is logged but never fails the run.
+    """
+    # Microseconds and PID: runs started in the same second get their own report
+    timestamp = metrics.started_at.astimezone().strftime("%Y%m%d_%H%M%S_%f")
+    json_path = os.path.join(METRICS_DIR, f"{metrics.mode}_{timestamp}_{os.getpid()}.json")
+    try:
+        report = metrics.write(json_path, PROMETHEUS_TEXTFILE, counts=counts)
+    except Exception as e:
+        logger.warning(f"Failed to write run metrics: {e}")
+        return
+    
+    summary = report["summary"]
+    if summary["transfer_seconds"] > 0:
+        logger.info(
+            f"Transferred {summary['bytes'] / 1e6:.1f} MB in {summary['transfer_seconds']:.1f}s "
+            f"of transfer time ({summary['bytes'] / 1e6 / summary['transfer_seconds']:.1f} MB/s per stream)"
+        )
+    logger.info(f"Metrics written to: {json_path}")
+
+def main(
+    workers: int = DOWNLOAD_WORKERS,
+    full_revalidation: bool = False,
+    crawl_depth: int = CRAWL_MAX_DEPTH,
+    convert: bool = False,
+):
+    setup_logging()
+    logger.info("="*60)
+    logger.info(f"Starting scrape at {datetime.now()}")
+    logger.info("="*60)
+    
+    # Note about deduplication
+    logger.info("Note: Deduplication uses conditional GETs (ETag/Last-Modified)")
+    logger.info(f"Identical files are stored once in {blob_dir} and hardlinked (or reflinked) into place")
+    logger.info("")
+    
+    metrics = telemetry.RunMetrics("scrape")
+    manifest = open_manifest()
+    cached_page = manifest.get_page(BASE_URL)
+    
+    logger.info(f"Fetching: {BASE_URL}")
+    try:
+        download_links, base_record = crawl(manifest, crawl_depth)
+    except Exception as e:
+        logger.error(f"Failed to fetch main page: {e}")
+        manifest.close()
+        return 1
+    
+    logger.info(f"Found {len(download_links)} total downloadable files")
+    
+    fingerprint = links_fingerprint(download_links)
+    index_unchanged = cached_page is not None and cached_page.get("links_sha256") == fingerprint
+    full_check = full_revalidation or not index_unchanged or full_revalidation_due(cached_page)
+    
+    logger.info(
+        f"Downloading with {workers} workers ({INITIAL_CONNECTIONS_PER_HOST}-"
+        f"{MAX_CONNECTIONS_PER_HOST} connections, {REQUESTS_PER_SECOND} req/s per host)"
+    )
+    
+    jobs, skipped_count = plan_downloads(download_links, manifest)
+    left_out = []
+    if not full_check:
+        jobs, left_out = sample_revalidation(jobs)
+    
+    pipeline = ConversionPipeline(manifest) if convert else None
+    downloaded_count, not_modified, failed_count = run_downloads(manifest, jobs, workers, metrics, pipeline)
+    skipped_count += not_modified
+    
+    # A sampled file with new content means the portal changes files in place
+    # without touching the index, so the sample can't vouch for the rest.
+    if left_out and sample_changed(manifest, jobs):
+        logger.warning(f"Sampled file changed - revalidating the remaining {len(left_out)} known files")
+        downloaded, not_modified, failed = run_downloads(manifest, left_out, workers, metrics, pipeline)
+        downloaded_count += downloaded
+        skipped_count += not_modified
+        failed_count += failed
+        full_check = True
+        left_out = []
+    skipped_count += len(left_out)
+    converted_count, convert_failed = pipeline.finish() if pipeline else (0, 0)
+    
+    try:
+        export_manifest(manifest)
+    except Exception:
+        failed_count += 1
+    
+    # Remember the link set on the BASE_URL page record. The fingerprint only
+    # counts as "unchanged" next time if this run left nothing unfinished.
+    previous = cached_page or {}
+    manifest.put_page(BASE_URL, {
+        **base_record,
+        "links_sha256": fingerprint if failed_count == 0 else None,
+        "full_revalidation_at": (
+            base_record["checked_at"] if full_check and failed_count == 0
+            else previous.get("full_revalidation_at")
+        ),
+    })
+    
+    compact_manifest(manifest)
+    write_run_metrics(metrics, downloaded=downloaded_count, skipped=skipped_count, failed=failed_count)
     
     # Final summary
     logger.info("="*60)
@@ -486,12 +1512,136 @@ def main():
     logger.info(f"Downloaded: {downloaded_count} files")
     logger.info(f"Skipped: {skipped_count} files")
     logger.info(f"Failed: {failed_count} files")
+    if pipeline:
+        logger.info(f"Converted: {converted_count} files ({convert_failed} failed)")
     logger.info(f"Total in manifest: {len(manifest)} files")
+    manifest.close()
     logger.info("")
     logger.info("Tip: Run cleanup.py to validate manifest and remove stale entries")
     logger.info("="*60)
     
-    return 0 if failed_count == 0 else 1
+    return 0 if failed_count == 0 and convert_failed == 0 else 1
+
+def plan_sync(plan_path: str, workers: int = DOWNLOAD_WORKERS, crawl_depth: int = CRAWL_MAX_DEPTH):
+    """
+    Dry run: discover links and revalidate every file concurrently, then
+    write the sync plan to plan_path. Downloads nothing and leaves the
+    manifest (file entries and cached pages) untouched.
+    """
+    setup_logging()
+    logger.info("="*60)
+    logger.info(f"Planning sync at {datetime.now()}")
+    logger.info("="*60)
+    
+    manifest = open_manifest()
+    logger.info(f"Fetching: {BASE_URL}")
+    try:
+        download_links, _ = crawl(manifest, crawl_depth, persist=False)
+    except Exception as e:
+        logger.error(f"Failed to fetch main page: {e}")
+        manifest.close()
+        return 1
+    
+    logger.info(f"Found {len(download_links)} total downloadable files")
+    jobs, skipped_count = plan_downloads(download_links, manifest)
+    manifest.close()
+    
+    logger.info(f"Revalidating {len(jobs)} files with {workers} workers")
+    plan = build_plan(jobs, skipped_count, workers)
+    write_plan(plan, plan_path)
+    
+    summary = plan["summary"]
+    logger.info("="*60)
+    logger.info("Plan completed!")
+    logger.info(f"New: {summary['new']} files")
+    logger.info(f"Changed: {summary['changed']} files")
+    logger.info(f"Unchanged: {summary['unchanged']} files")
+    logger.info(f"Errors: {summary['error']} files")
+    logger.info(
+        f"To fetch: {summary['fetch_files']} files, {summary['fetch_bytes'] / 1e6:.1f} MB"
+        + (f" (+{summary['fetch_unknown_size']} of unknown size)" if summary["fetch_unknown_size"] else "")
+    )
+    if plan_path != "-":
+        logger.info(f"Plan written to: {plan_path}")
+    logger.info("="*60)
+    
+    return 0 if summary["error"] == 0 else 1
+
+def execute_plan(plan_path: str, workers: int = DOWNLOAD_WORKERS, convert: bool = False):
+    """
+    Download the new/changed files listed in a plan from plan_sync(),
+    without fetching or re-parsing the portal page.
+    """
+    setup_logging()
+    logger.info("="*60)
+    logger.info(f"Executing plan {plan_path} at {datetime.now()}")
+    logger.info("="*60)
+    
+    metrics = telemetry.RunMetrics("execute_plan")
+    try:
+        plan = load_plan(plan_path)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load plan: {e}")
+        return 1
+    
+    manifest = open_manifest()
+    jobs = jobs_from_plan(plan, manifest)
+    logger.info(
+        f"Plan from {plan['created_at']}: {len(jobs)} files to fetch, "
+        f"{plan['summary']['fetch_bytes'] / 1e6:.1f} MB"
+    )
+    
+    pipeline = ConversionPipeline(manifest) if convert else None
+    downloaded_count, skipped_count, failed_count = run_downloads(manifest, jobs, workers, metrics, pipeline)
+    converted_count, convert_failed = pipeline.finish() if pipeline else (0, 0)
+    
+    try:
+        export_manifest(manifest)
+    except Exception:
+        failed_count += 1
+    
+    compact_manifest(manifest)
+    write_run_metrics(metrics, downloaded=downloaded_count, skipped=skipped_count, failed=failed_count)
+    
+    logger.info("="*60)
+    logger.info("Plan executed!")
+    logger.info(f"Downloaded: {downloaded_count} files")
+    logger.info(f"Skipped: {skipped_count} files")
+    logger.info(f"Failed: {failed_count} files")
+    if pipeline:
+        logger.info(f"Converted: {converted_count} files ({convert_failed} failed)")
+    logger.info(f"Total in manifest: {len(manifest)} files")
+    manifest.close()
+    logger.info("="*60)
+    
+    return 0 if failed_count == 0 and convert_failed == 0 else 1
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape OFLC disclosure files from the DOL portal.")
+    parser.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS,
+                        help="concurrent download workers")
+    parser.add_argument("--full", action="store_true",
+                        help="revalidate every known file even if the portal is unchanged")
+    parser.add_argument("--crawl-depth", type=int, default=CRAWL_MAX_DEPTH,
+                        help="follow same-site sub-pages this many hops from the portal page")
+    parser.add_argument("--convert", action="store_true",
+                        help="convert new/changed workbooks to Parquet while downloading")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--plan", metavar="PATH",
+                      help="dry run: write the sync plan as JSON to PATH ('-' for stdout)")
+    mode.add_argument("--execute-plan", metavar="PATH",
+                      help="download the files listed in a plan without rediscovering")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    args = parse_args()
+    if args.plan:
+        exit(plan_sync(args.plan, workers=args.workers, crawl_depth=args.crawl_depth))
+    if args.execute_plan:
+        exit(execute_plan(args.execute_plan, workers=args.workers, convert=args.convert))
+    exit(main(
+        workers=args.workers,
+        full_revalidation=args.full,
+        crawl_depth=args.crawl_depth,
+        convert=args.convert,
+    ))
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""
+telemetry.py — Per-file download metrics for scrape.py.
+
+Features:
+- One metrics record per file: DNS, connect (TCP + TLS), time-to-first-byte
+  and transfer time, bytes, throughput, revalidation result and retries
+- Records are attributed to the file being fetched on the current thread,
+  so transport hooks (see http_session.py) can add connection timings
+- Per-run JSON report (every file) and a Prometheus textfile-collector
+  (.prom) export of per-program aggregates
+"""
+
+import os
+import json
+import time
+import threading
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+METRIC_PREFIX = "oflc_scrape"
+
+# Timing fields summed over every request made for a file
+TIMING_FIELDS = ("dns_seconds", "connect_seconds", "ttfb_seconds", "transfer_seconds")
+
+# Upper bounds (seconds) of the per-file duration histogram in the .prom
+# export; per-file detail is only in the JSON report, so the number of
+# series stays fixed as files are added
+DURATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300)
+
+# --- Per-file records -------------------------------------------------
+
+_local = threading.local()
+
+def current() -> Optional[Dict]:
+    """The metrics record for the file being fetched on this thread, if any."""
+    return getattr(_local, "record", None)
+
+def new_record(url: str, **fields) -> Dict:
+    record = {
+        "url": url,
+        "result": None,
+        "status_code": None,
+        "bytes": 0,
+        "size": None,
+        "dns_seconds": 0.0,
+        "connect_seconds": 0.0,
+        "ttfb_seconds": 0.0,
+        "transfer_seconds": 0.0,
+        "total_seconds": 0.0,
+        "throughput_bytes_per_second": None,
+        "connections_opened": 0,
+        "http_retries": 0,
+        "resume_attempts": 0,
+        "error": None,
+    }
+    record.update(fields)
+    return record
+
+@contextmanager
+def track(url: str, metrics: Optional["RunMetrics"] = None, **fields) -> Iterator[Dict]:
+    """
+    Collect metrics for one file fetched on the current thread. Yields the
+    record so the caller can fill in the result; on exit the record is
+    finalized and added to `metrics`. Exceptions mark it "failed".
+    """
+    record = new_record(url, **fields)
+    previous = current()
+    _local.record = record
+    start = time.monotonic()
+    try:
+        yield record
+    except Exception as e:
+        record["result"] = "failed"
+        record["error"] = str(e)
+        raise
+    finally:
+        _local.record = previous
+        record["total_seconds"] = time.monotonic() - start
+        if record["bytes"] and record["transfer_seconds"] > 0:
+            record["throughput_bytes_per_second"] = record["bytes"] / record["transfer_seconds"]
+        if metrics is not None:
+            metrics.add(record)
+
+def add(field: str, value: float):
+    """Add to a numeric field of the current thread's record, if tracking."""
+    record = current()
+    if record is not None:
+        record[field] += value
+
+# --- Run reports ------------------------------------------------------
+
+class RunMetrics:
+    """Thread-safe collection of per-file records for one run."""
+
+    def __init__(self, mode: str = "scrape"):
+        self.mode = mode
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self.files: List[Dict] = []
+
+    def add(self, record: Dict):
+        with self._lock:
+            self.files.append(record)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            files = list(self.files)
+        results: Dict[str, int] = {}
+        for record in files:
+            results[record["result"]] = results.get(record["result"], 0) + 1
+        summary = {"files": len(files), "results": results}
+        for field in ("bytes", "http_retries", "resume_attempts", "connections_opened") + TIMING_FIELDS:
+            summary[field] = sum(record[field] for record in files)
+        return summary
+
+    def report(self, **extra) -> Dict:
+        """The full run report: timing, summary, extra fields, per-file records."""
+        with self._lock:
+            files = list(self.files)
+        return {
+            "mode": self.mode,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "duration_seconds": time.monotonic() - self._start,
+            "summary": self.summary(),
+            **extra,
+            "files": files,
+        }
+
+    def write(self, json_path: str, prom_path: Optional[str] = None, **extra) -> Dict:
+        """Write the JSON report and, if given, the Prometheus textfile."""
+        report = self.report(**extra)
+        _atomic_write(json_path, json.dumps(report, indent=2))
+        if prom_path:
+            _atomic_write(prom_path, prometheus_text(report))
+        return report
+
+def _atomic_write(path: str, text: str):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    temp_fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".metrics_", suffix=".tmp")
+    try:
+        with os.fdopen(temp_fd, "w") as f:
+            f.write(text)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except Exception:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+# --- Prometheus textfile format ---------------------------------------
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels: Dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in labels.items()) + "}"
+
+def prometheus_text(report: Dict) -> str:
+    """Render a run report in the Prometheus text exposition format."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        name = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(labels)} {value}")
+
+    mode = {"mode": report["mode"]}
+    summary = report["summary"]
+    finished = datetime.fromisoformat(report["finished_at"]).timestamp()
+
+    metric("last_run_timestamp_seconds", "gauge", "Unix time the last run finished.",
+           [(mode, f"{finished:.0f}")])
+    metric("run_duration_seconds", "gauge", "Wall-clock duration of the last run.",
+           [(mode, f"{report['duration_seconds']:.3f}")])
+    metric("run_files", "gauge", "Files requested in the last run, by result.",
+           [({**mode, "result": result}, count) for result, count in sorted(summary["results"].items())])
+    metric("run_bytes", "gauge", "Bytes transferred in the last run.",
+           [(mode, summary["bytes"])])
+    metric("run_http_retries", "gauge", "HTTP retries in the last run.",
+           [(mode, summary["http_retries"])])
+    metric("run_resume_attempts", "gauge", "Download resumes in the last run.",
+           [(mode, summary["resume_attempts"])])
+
+    # Aggregates by program: a fixed number of series however many files
+    by_program: Dict[str, List[Dict]] = {}
+    for record in report["files"]:
+        by_program.setdefault(record.get("program") or "", []).append(record)
+    programs = sorted(by_program)
+
+    counts: Dict[tuple, int] = {}
+    for program in programs:
+        for record in by_program[program]:
+            key = (program, record["result"])
+            counts[key] = counts.get(key, 0) + 1
+    metric("program_files", "gauge", "Files requested in the last run, by program and result.",
+           [({**mode, "program": program, "result": result}, count)
+            for (program, result), count in sorted(counts.items(), key=lambda item: (item[0][0], str(item[0][1])))])
+    metric("program_bytes", "gauge", "Bytes transferred in the last run, by program.",
+           [({**mode, "program": program}, sum(r["bytes"] for r in by_program[program])) for program in programs])
+    metric("program_retries", "gauge", "HTTP retries plus download resumes in the last run, by program.",
+           [({**mode, "program": program}, sum(r["http_retries"] + r["resume_attempts"] for r in by_program[program]))
+            for program in programs])
+    metric("program_phase_seconds", "gauge",
+           "Time spent in each phase (dns, connect, ttfb, transfer) in the last run, by program.",
+           [({**mode, "program": program, "phase": field[:-len("_seconds")]},
+             f"{sum(r[field] for r in by_program[program]):.6g}")
+            for program in programs for field in TIMING_FIELDS])
+
+    name = f"{METRIC_PREFIX}_file_duration_seconds"
+    lines.append(f"# HELP {name} Time to revalidate or download each file in the last run, by program.")
+    lines.append(f"# TYPE {name} histogram")
+    for program in programs:
+        labels = {**mode, "program": program}
+        durations = [r["total_seconds"] for r in by_program[program]]
+        for bound in DURATION_BUCKETS:
+            count = sum(1 for d in durations if d <= bound)
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': f'{bound:g}'})} {count}")
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {len(durations)}")
+        lines.append(f"{name}_sum{_labels(labels)} {sum(durations):.6g}")
+        lines.append(f"{name}_count{_labels(labels)} {len(durations)}")
+
+    return "\n".join(lines) + "\n"
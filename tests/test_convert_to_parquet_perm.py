@@ -0,0 +1,136 @@
+import os
+import sys
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import convert_to_parquet_perm as converter
+
+openpyxl = pytest.importorskip("openpyxl")
+
+def write_workbook(path, rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+def as_records(df):
+    """Columns and rows of an all-string frame, with nulls as None."""
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.columns), df.values.tolist()
+
+SHEETS = {
+    "extra_columns": [
+        ["A", "B", None, "D"],
+        ["1", "x", None, "d", "extra"],
+        [None] * 5,
+        ["r", None, None, None, None, "far"],
+        [None] * 6,
+    ],
+    "na_values": [
+        ["CASE", "WAGE", "NOTE", "FLAG", "DATE"],
+        ["NA", "N/A", "", "null", "keep"],
+        [2.0, 1.5, "#N/A", True, datetime(2020, 1, 2)],
+    ],
+    "duplicate_headers": [
+        ["A", "A", "A.1", None, "Unnamed: 3"],
+        ["1", "2", "3", "4", "5"],
+    ],
+    "header_only": [["A", "B"]],
+}
+
+@pytest.mark.parametrize("sheet", sorted(SHEETS))
+@pytest.mark.parametrize("batch_rows", [1, 2, 1000])
+def test_convert_file_matches_read_excel(tmp_path, monkeypatch, sheet, batch_rows):
+    source = str(tmp_path / "sheet.xlsx")
+    write_workbook(source, SHEETS[sheet])
+    monkeypatch.setattr(converter, "XLSX_BATCH_ROWS", batch_rows)
+
+    parquet_path, rows = converter.convert_file(source, str(tmp_path / "sheet.parquet"))
+
+    expected = pd.read_excel(source, dtype=str)
+    assert rows == len(expected)
+    assert as_records(pq.read_table(parquet_path).to_pandas()) == as_records(expected)
+
+def test_archive_workbook_member_widened_after_first_batch(tmp_path, monkeypatch):
+    source = str(tmp_path / "sheet.xlsx")
+    write_workbook(source, SHEETS["extra_columns"])
+    archive = str(tmp_path / "archive.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.write(source, "sheet.xlsx")
+    monkeypatch.setattr(converter, "XLSX_BATCH_ROWS", 1)
+
+    _, members = converter.convert_archive(archive, str(tmp_path / "out"))
+
+    assert members[0]["error"] is None
+    table = pq.read_table(members[0]["parquet_path"]).to_pandas()
+    assert as_records(table) == as_records(pd.read_excel(source, dtype=str))
+
+def test_archive_members_never_share_an_output(tmp_path):
+    archive = str(tmp_path / "archive.zip")
+    names = ["x.csv", "x.xlsx", "a/b.csv", "a__b.csv", "A/B.CSV"]
+    with zipfile.ZipFile(archive, "w") as zf:
+        for i, name in enumerate(names):
+            if name.endswith(".xlsx"):
+                source = str(tmp_path / "sheet.xlsx")
+                write_workbook(source, [["col"], [str(i)]])
+                zf.write(source, name)
+            else:
+                zf.writestr(name, f"col\n{i}\n")
+
+    _, members = converter.convert_archive(archive, str(tmp_path / "out"))
+
+    paths = [member["parquet_path"] for member in members]
+    assert all(member["error"] is None for member in members)
+    assert len({path.lower() for path in paths}) == len(names)
+    assert os.path.basename(paths[0]) == "x.csv.parquet"
+    for i, path in enumerate(paths):
+        assert pq.read_table(path).column("col").to_pylist() == [str(i)]
+
+def test_corrupt_workbook_member_fails_only_itself(tmp_path):
+    archive = str(tmp_path / "archive.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("first.csv", "col\n1\n")
+        zf.writestr("legacy.xlsx", b"not a workbook")
+        zf.writestr("last.csv", "col\n3\n")
+
+    _, members = converter.convert_archive(archive, str(tmp_path / "out"))
+
+    first, legacy, last = members
+    assert legacy["error"] and legacy["parquet_path"] is None and legacy["sha256"]
+    assert first["error"] is None and last["error"] is None
+    assert pq.read_table(last["parquet_path"]).column("col").to_pylist() == ["3"]
+
+def test_damaged_archive_stream_still_fails(tmp_path):
+    archive = str(tmp_path / "archive.zip")
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("data.csv", "col\n" + "1\n" * 1000)
+    data = bytearray(open(archive, "rb").read())
+    offset = data.index(b"col\n") + 100
+    data[offset] = ord("2")
+    open(archive, "wb").write(bytes(data))
+
+    with pytest.raises(zipfile.BadZipFile):
+        converter.convert_archive(archive, str(tmp_path / "out"))
+
+def test_large_workbook_member_is_spooled_to_disk(tmp_path, monkeypatch):
+    source = str(tmp_path / "sheet.xlsx")
+    write_workbook(source, SHEETS["na_values"])
+    archive = str(tmp_path / "archive.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.write(source, "sheet.xlsx")
+    monkeypatch.setattr(converter, "MEMBER_SPOOL_BYTES", 1024)
+
+    output_dir = tmp_path / "out"
+    _, members = converter.convert_archive(archive, str(output_dir))
+
+    assert members[0]["error"] is None
+    table = pq.read_table(members[0]["parquet_path"]).to_pandas()
+    assert as_records(table) == as_records(pd.read_excel(source, dtype=str))
+    assert sorted(os.listdir(output_dir)) == ["sheet.xlsx.parquet"]
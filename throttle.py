@@ -0,0 +1,171 @@
+"""
+throttle.py — Request pacing for polite crawling.
+
+Features:
+- Token-bucket rate limiter (requests/second, or bytes/second for a bandwidth cap)
+- Server-requested pauses (Retry-After) honored by every thread using the bucket
+- AIMD adaptive concurrency: additive ramp-up while responses are fast,
+  multiplicative back-off on 429/503 or slow responses
+- Per-host throttle combining the two
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+# Responses that mean "slow down"
+OVERLOAD_STATUSES = (429, 503)
+
+# --- Rate limiting ----------------------------------------------------
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, bursting up to
+    `capacity`. acquire() may take more than the bucket holds (e.g. a large
+    chunk against a bandwidth cap); the deficit is paid off by waiting.
+    A rate of None means unlimited, but pause() is still honored.
+    """
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate or 0.0, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0):
+        """Take `amount` tokens, sleeping until they are available."""
+        with self._lock:
+            now = time.monotonic()
+            # _updated is in the future while a pause is in effect
+            if now > self._updated:
+                if self.rate:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+            wait = self._updated - now
+            if self.rate:
+                self._tokens -= amount
+                if self._tokens < 0:
+                    wait += -self._tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold every caller for `seconds`, then resume from an empty bucket."""
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._updated:
+                self._tokens = min(self._tokens, 0.0)
+                self._updated = until
+
+# --- Adaptive concurrency ---------------------------------------------
+
+class AdaptiveConcurrency:
+    """
+    Limit on in-flight requests, adjusted AIMD-style: each healthy response
+    adds 1/limit (about +1 per round of requests), an overload signal halves
+    the limit and a slow response trims it by 10%. Decreases are spaced at
+    least `cooldown` seconds apart so one burst of errors from requests that
+    were already in flight only counts once.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: Optional[int] = None,
+        latency_target: Optional[float] = None,
+        cooldown: float = 1.0,
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = maximum or initial
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self, latency: float):
+        """Record a healthy response that took `latency` seconds to arrive."""
+        with self._cond:
+            if self.latency_target and latency > self.latency_target:
+                self._decrease(0.9)
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                self._cond.notify_all()
+
+    def on_overload(self):
+        """Record a 429/503 (or similar) from the server."""
+        with self._cond:
+            self._decrease(0.5)
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self.limit = max(self.minimum, self.limit * factor)
+        self._last_decrease = now
+
+# --- Per-host throttle ------------------------------------------------
+
+class HostThrottle:
+    """
+    Politeness state for one host: a request-rate bucket plus an adaptive
+    cap on concurrent connections. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float],
+        burst: Optional[float] = None,
+        initial_concurrency: int = 1,
+        max_concurrency: Optional[int] = None,
+        latency_target: Optional[float] = None,
+        cooldown: float = 1.0,
+    ):
+        self.requests = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(
+            initial_concurrency,
+            maximum=max_concurrency,
+            latency_target=latency_target,
+            cooldown=cooldown,
+        )
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the host's connection slots for the duration."""
+        self.concurrency.acquire()
+        try:
+            yield self
+        finally:
+            self.concurrency.release()
+
+    def wait(self):
+        """Block until the rate limit allows another request."""
+        self.requests.acquire()
+
+    def record(self, status: int, latency: float, retry_after: Optional[float] = None):
+        """Feed a response back into the controller."""
+        if status in OVERLOAD_STATUSES:
+            self.backoff(retry_after)
+        elif status < 500:
+            self.concurrency.on_success(latency)
+
+    def backoff(self, retry_after: Optional[float] = None):
+        """Shrink concurrency and, if the server asked, pause all requests."""
+        self.concurrency.on_overload()
+        if retry_after:
+            self.requests.pause(retry_after)